@@ -0,0 +1,57 @@
+"""
+Storage backend selection for the MeetMii analytics service.
+
+- ANALYTICS_STORE: "bigquery" (default) uses bigquery_client; "local" uses
+                   the SQLite backend in local_store.
+
+- AUTO_CREATE_SCHEMA: "true" (default) makes main.py create the dataset and
+                      scan_events table at startup. Set it to "false" in
+                      production and run migrate.py at deploy time instead.
+
+- scan_row: turns a scan event message (as published to qr-scanned or
+            spooled by profile_service) into the row every backend stores.
+            Events without an event_id get one derived from username and
+            scanned_at, so the same event always gets the same id.
+
+Every backend module exposes get_or_create_dataset, get_or_create_table,
+ping, log_scan, import_scans and get_scan_stats. Modules are imported only
+when selected, so the local backend never builds a BigQuery client.
+"""
+
+import os
+import hashlib
+import importlib
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AUTO_CREATE_SCHEMA = os.getenv("AUTO_CREATE_SCHEMA", "true").lower() == "true"
+
+_STORES = {"bigquery": "bigquery_client", "local": "local_store"}
+
+
+def load_store():
+    """Return the storage module selected by ANALYTICS_STORE."""
+    name = os.getenv("ANALYTICS_STORE", "bigquery")
+    if name not in _STORES:
+        raise ValueError(f"ANALYTICS_STORE must be one of {sorted(_STORES)}, got {name!r}")
+    return importlib.import_module(_STORES[name])
+
+
+def scan_row(event: dict) -> dict:
+    """Return the scan_events row for a decoded scan event message."""
+    username = event["username"]
+    scanned_at = event.get("scanned_at")
+    scanned_at = datetime.fromisoformat(scanned_at) if scanned_at else datetime.now(timezone.utc)
+    if scanned_at.tzinfo is None:
+        scanned_at = scanned_at.replace(tzinfo=timezone.utc)
+    event_id = event.get("event_id") or hashlib.blake2b(
+        f"{username}|{scanned_at.isoformat()}".encode(), digest_size=16
+    ).hexdigest()
+    return {
+        "event_id": event_id,
+        "username": username,
+        "scanned_at": scanned_at,
+        "ip_address": event.get("ip_address"),
+    }
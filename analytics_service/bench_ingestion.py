@@ -0,0 +1,91 @@
+"""
+Ingestion benchmark for the MeetMii analytics service.
+
+Drives pubsub_subscriber.process_message, the same callback the streaming
+pull invokes, with synthetic scan messages from a pool of worker threads
+(the Pub/Sub client runs callbacks on a 10-thread pool by default) against
+the local SQLite store, then reads stats back through get_scan_stats.
+Reports messages/sec, p50/p99 callback latency and stats query latency.
+
+Usage:
+    python bench_ingestion.py --messages 100000 --threads 10
+    LOCAL_STORE_PATH=/tmp/scans.db python bench_ingestion.py
+"""
+
+import os
+
+os.environ["ANALYTICS_STORE"] = "local"
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+import pubsub_subscriber
+
+store = pubsub_subscriber.store
+
+
+class FakeMessage:
+    """Minimal stand-in for a Pub/Sub message as seen by the callback."""
+
+    __slots__ = ("data", "acked")
+
+    def __init__(self, username: str):
+        self.data = json.dumps({
+            "username": username,
+            "scanned_at": datetime.now(timezone.utc).isoformat(),
+        }).encode("utf-8")
+        self.acked = False
+
+    def ack(self) -> None:
+        self.acked = True
+
+    def nack(self) -> None:
+        self.acked = False
+
+
+def timed_callback(message: FakeMessage) -> float:
+    start = time.perf_counter()
+    pubsub_subscriber.process_message(message)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--threads", type=int, default=10)
+    args = parser.parse_args()
+
+    store.get_or_create_table()
+    rng = np.random.default_rng(0)
+    usernames = [f"user{u}" for u in (rng.zipf(1.3, args.messages) % args.users).tolist()]
+    messages = [FakeMessage(username) for username in usernames]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        latencies = np.array(list(pool.map(timed_callback, messages, chunksize=256))) * 1000
+    elapsed = time.perf_counter() - start
+
+    acked = sum(message.acked for message in messages)
+    print(f"{args.messages:,} messages on {args.threads} threads in {elapsed:.2f}s")
+    print(f"  {args.messages / elapsed:,.0f} messages/s, {acked:,} acked")
+    print(f"  callback p50 {np.percentile(latencies, 50):.3f} ms, p99 {np.percentile(latencies, 99):.3f} ms")
+
+    stats_latencies = []
+    for username in sorted(set(usernames))[:1000]:
+        start = time.perf_counter()
+        store.get_scan_stats(username)
+        stats_latencies.append((time.perf_counter() - start) * 1000)
+    print(
+        f"  get_scan_stats p50 {np.percentile(stats_latencies, 50):.3f} ms, "
+        f"p99 {np.percentile(stats_latencies, 99):.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
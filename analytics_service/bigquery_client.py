@@ -3,21 +3,38 @@ BigQuery client setup for MeetMii analytics service.
 
 Creates the dataset and scan_events table if they don't already exist.
 All functions are idempotent — safe to call on every startup.
+
+The google.cloud.bigquery import and the client itself are deferred to
+get_client, so importing this module costs nothing on a cold start.
 """
 
 import os
+import threading
 from dotenv import load_dotenv
-from google.cloud import bigquery
-from google.cloud.exceptions import Conflict
+import metrics
 
 load_dotenv()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 DATASET_ID = os.getenv("BIGQUERY_DATASET_ID")
 
-client = bigquery.Client(project=PROJECT_ID)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the shared BigQuery client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.cloud import bigquery
+
+                _client = bigquery.Client(project=PROJECT_ID)
+    return _client
 
 
+@metrics.timed("bigquery", "get_or_create_dataset")
 def get_or_create_dataset():
     """Create the BigQuery dataset if it does not already exist.
 
@@ -25,6 +42,10 @@ def get_or_create_dataset():
     Silently succeeds if the dataset already exists.
     Returns the Dataset object.
     """
+    from google.cloud import bigquery
+    from google.cloud.exceptions import Conflict
+
+    client = get_client()
     dataset_ref = bigquery.Dataset(f"{PROJECT_ID}.{DATASET_ID}")
     try:
         return client.create_dataset(dataset_ref)
@@ -32,6 +53,18 @@ def get_or_create_dataset():
         return client.get_dataset(dataset_ref)
 
 
+def _scan_events_schema():
+    from google.cloud import bigquery
+
+    return [
+        bigquery.SchemaField("username", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("scanned_at", "TIMESTAMP", mode="REQUIRED"),
+        bigquery.SchemaField("ip_address", "STRING", mode="NULLABLE"),
+        bigquery.SchemaField("event_id", "STRING", mode="NULLABLE"),
+    ]
+
+
+@metrics.timed("bigquery", "get_or_create_table")
 def get_or_create_table():
     """Create the scan_events table if it does not already exist.
 
@@ -39,27 +72,45 @@ def get_or_create_table():
       - username:   STRING, required — the profile username that was scanned
       - scanned_at: TIMESTAMP, required — when the scan occurred
       - ip_address: STRING, nullable — the IP address of the scanner
+      - event_id:   STRING, nullable — unique per scan, used to deduplicate
+                    redeliveries and replays
 
-    Silently succeeds if the table already exists.
+    Silently succeeds if the table already exists, adding event_id to a
+    table created before it existed.
     Returns the Table object.
     """
+    from google.cloud import bigquery
+    from google.cloud.exceptions import Conflict
+
+    client = get_client()
     table_ref = f"{PROJECT_ID}.{DATASET_ID}.scan_events"
-    schema = [
-        bigquery.SchemaField("username", "STRING", mode="REQUIRED"),
-        bigquery.SchemaField("scanned_at", "TIMESTAMP", mode="REQUIRED"),
-        bigquery.SchemaField("ip_address", "STRING", mode="NULLABLE"),
-    ]
-    table = bigquery.Table(table_ref, schema=schema)
+    schema = _scan_events_schema()
     try:
-        return client.create_table(table)
+        return client.create_table(bigquery.Table(table_ref, schema=schema))
     except Conflict:
-        return client.get_table(table_ref)
+        table = client.get_table(table_ref)
+        if "event_id" not in {field.name for field in table.schema}:
+            table.schema = [*table.schema, schema[-1]]
+            table = client.update_table(table, ["schema"])
+        return table
+
+
+@metrics.timed("bigquery", "ping")
+def ping() -> None:
+    """Fetch the scan_events table metadata; raises if BigQuery is unreachable.
+
+    A metadata read is free and never scans data, unlike a SELECT 1 job.
+    """
+    get_client().get_table(f"{PROJECT_ID}.{DATASET_ID}.scan_events")
 
 
-def log_scan(username: str, ip_address: str = None) -> bool:
+@metrics.timed("bigquery", "log_scan")
+def log_scan(username: str, ip_address: str = None, scanned_at=None, event_id: str = None) -> bool:
     """Insert a scan event row into the scan_events BigQuery table.
 
-    Sets scanned_at to the current UTC timestamp automatically.
+    scanned_at defaults to the current UTC timestamp. event_id is also sent
+    as the streaming insert ID, so BigQuery drops a redelivered message
+    that is inserted again within its deduplication window.
     Returns True on success, raises an exception if the insert fails.
     """
     from datetime import datetime, timezone
@@ -68,16 +119,81 @@ def log_scan(username: str, ip_address: str = None) -> bool:
     rows = [
         {
             "username": username,
-            "scanned_at": datetime.now(timezone.utc).isoformat(),
+            "scanned_at": (scanned_at or datetime.now(timezone.utc)).isoformat(),
             "ip_address": ip_address,
+            "event_id": event_id,
         }
     ]
-    errors = client.insert_rows_json(table_ref, rows)
+    options = {"row_ids": [event_id]} if event_id else {}
+    errors = get_client().insert_rows_json(table_ref, rows, **options)
     if errors:
         raise RuntimeError(f"BigQuery insert failed: {errors}")
     return True
 
 
+@metrics.timed("bigquery", "import_scans")
+def import_scans(batches, workers: int = 8) -> int:
+    """Load batches of backends.scan_row rows, skipping known event_ids.
+
+    Batches are loaded into a staging table by up to workers parallel load
+    jobs, which are free and not subject to streaming insert quotas. One
+    MERGE then inserts the staged rows whose event_id is not yet in
+    scan_events, keeping one row per event_id. The staging table is always
+    dropped. Returns the number of rows inserted.
+    """
+    import uuid
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    from google.cloud import bigquery
+
+    client = get_client()
+    table_ref = f"{PROJECT_ID}.{DATASET_ID}.scan_events"
+    staging_ref = f"{PROJECT_ID}.{DATASET_ID}.scan_events_import_{uuid.uuid4().hex}"
+    schema = _scan_events_schema()
+    client.create_table(bigquery.Table(staging_ref, schema=schema))
+    job_config = bigquery.LoadJobConfig(
+        schema=schema,
+        source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    )
+
+    def load(rows: list[dict]) -> None:
+        data = [{**row, "scanned_at": row["scanned_at"].isoformat()} for row in rows]
+        client.load_table_from_json(data, staging_ref, job_config=job_config).result()
+
+    try:
+        # Keep at most two batches per worker in memory rather than the whole input
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for rows in batches:
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(pool.submit(load, rows))
+            for future in pending:
+                future.result()
+
+        job = client.query(
+            f"""
+            MERGE `{table_ref}` AS target
+            USING (
+                SELECT * FROM `{staging_ref}`
+                WHERE TRUE
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY event_id ORDER BY scanned_at) = 1
+            ) AS source
+            ON target.event_id = source.event_id
+            WHEN NOT MATCHED THEN
+                INSERT (username, scanned_at, ip_address, event_id)
+                VALUES (source.username, source.scanned_at, source.ip_address, source.event_id)
+            """
+        )
+        job.result()
+        return job.num_dml_affected_rows or 0
+    finally:
+        client.delete_table(staging_ref, not_found_ok=True)
+
+
+@metrics.timed("bigquery", "get_scan_stats")
 def get_scan_stats(username: str) -> dict:
     """Query BigQuery for scan counts for a given username.
 
@@ -89,6 +205,9 @@ def get_scan_stats(username: str) -> dict:
     Returns a dict with those three keys. Returns all zeros if the
     username has no recorded scans.
     """
+    from google.cloud import bigquery
+
+    client = get_client()
     table = f"`{PROJECT_ID}.{DATASET_ID}.scan_events`"
 
     def run(where_clause: str) -> int:
@@ -0,0 +1,143 @@
+"""
+Local SQLite storage backend for the MeetMii analytics service.
+
+Exposes the same functions as bigquery_client so the service can ingest and
+serve scan stats without a GCP project, credentials or network access.
+scan_events lives in a SQLite database at LOCAL_STORE_PATH (":memory:" by
+default) with scanned_at stored as UTC epoch seconds, the same layout
+insights_service/local_store.py reads, so both services can share one file.
+
+Selected with ANALYTICS_STORE=local (see backends.py).
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", ":memory:")
+
+_conn = sqlite3.connect(LOCAL_STORE_PATH, check_same_thread=False)
+_lock = threading.Lock()
+
+
+def get_or_create_dataset():
+    """No-op: a SQLite file is its own dataset. Kept for interface parity."""
+    return LOCAL_STORE_PATH
+
+
+def get_or_create_table():
+    """Create the scan_events table and its indexes if they don't exist.
+
+    Uses the same columns as the BigQuery table: username (required),
+    scanned_at (required, epoch seconds), ip_address (nullable) and
+    event_id (nullable, unique). event_id is added to a table created
+    before it existed, e.g. by insights_service/local_store.py.
+    """
+    with _lock:
+        _conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scan_events (
+                username   TEXT NOT NULL,
+                scanned_at REAL NOT NULL,
+                ip_address TEXT,
+                event_id   TEXT
+            )
+            """
+        )
+        columns = {row[1] for row in _conn.execute("PRAGMA table_info(scan_events)")}
+        if "event_id" not in columns:
+            _conn.execute("ALTER TABLE scan_events ADD COLUMN event_id TEXT")
+        _conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS ix_scan_events_username_scanned_at
+                ON scan_events (username, scanned_at);
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_scan_events_event_id
+                ON scan_events (event_id);
+            """
+        )
+    return "scan_events"
+
+
+def ping() -> None:
+    """Run a trivial query; raises if the database file is unusable."""
+    with _lock:
+        _conn.execute("SELECT 1 FROM scan_events LIMIT 1")
+
+
+def count_scans() -> int:
+    """Return the number of rows in scan_events. Local only, for load tests."""
+    with _lock:
+        return _conn.execute("SELECT COUNT(*) FROM scan_events").fetchone()[0]
+
+
+_INSERT = (
+    "INSERT OR IGNORE INTO scan_events (event_id, username, scanned_at, ip_address) VALUES (?, ?, ?, ?)"
+)
+
+
+def log_scan(username: str, ip_address: str = None, scanned_at: datetime = None, event_id: str = None) -> bool:
+    """Insert a scan event row, stamped with scanned_at or the current UTC time.
+
+    A row whose event_id is already stored is skipped.
+    """
+    scanned_at = scanned_at or datetime.now(timezone.utc)
+    with _lock:
+        _conn.execute(_INSERT, (event_id, username, scanned_at.timestamp(), ip_address))
+        _conn.commit()
+    return True
+
+
+def import_scans(batches, workers: int = 1) -> int:
+    """Insert batches of backends.scan_row rows, skipping known event_ids.
+
+    SQLite has one writer, so batches are applied in order, one transaction
+    each, and workers is ignored. Returns the number of rows inserted.
+    """
+    inserted = 0
+    for rows in batches:
+        with _lock:
+            before = _conn.total_changes
+            _conn.executemany(
+                _INSERT,
+                (
+                    (row["event_id"], row["username"], row["scanned_at"].timestamp(), row["ip_address"])
+                    for row in rows
+                ),
+            )
+            _conn.commit()
+            inserted += _conn.total_changes - before
+    return inserted
+
+
+def get_scan_stats(username: str) -> dict:
+    """Return total, 7-day and 30-day scan counts for a username.
+
+    Computes all three counts in one indexed query. Returns all zeros if the
+    username has no recorded scans.
+    """
+    now = datetime.now(timezone.utc)
+    with _lock:
+        total, this_week, this_month = _conn.execute(
+            """
+            SELECT COUNT(*),
+                   COALESCE(SUM(scanned_at >= ?), 0),
+                   COALESCE(SUM(scanned_at >= ?), 0)
+            FROM scan_events
+            WHERE username = ?
+            """,
+            (
+                (now - timedelta(days=7)).timestamp(),
+                (now - timedelta(days=30)).timestamp(),
+                username,
+            ),
+        ).fetchone()
+
+    return {
+        "total_scans": total,
+        "scans_this_week": this_week,
+        "scans_this_month": this_month,
+    }
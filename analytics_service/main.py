@@ -1,20 +1,35 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-import bigquery_client
+from fastapi.responses import JSONResponse
+import backends
+import health
+import metrics
 import pubsub_subscriber
 import schemas
 
-bigquery_client.get_or_create_dataset()
-bigquery_client.get_or_create_table()
+store = backends.load_store()
+if backends.AUTO_CREATE_SCHEMA:
+    store.get_or_create_dataset()
+    store.get_or_create_table()
+
+prober = health.Prober(
+    background={"store": health.ping_check(store.ping)},
+    instant={"subscription": pubsub_subscriber.status},
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    pubsub_subscriber.start_subscriber()
+    # Leave PUBSUB_SUBSCRIPTION_NAME unset to run locally without Pub/Sub
+    if pubsub_subscriber.SUBSCRIPTION_NAME:
+        pubsub_subscriber.start_subscriber()
+    prober.start()
     yield
+    prober.stop()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 @app.get("/")
@@ -22,18 +37,32 @@ def root():
     return {"message": "MeetMii analytics service is running"}
 
 
+@app.get("/metrics")
+def prometheus_metrics():
+    return metrics.metrics_response()
+
+
+@app.get("/livez")
+async def livez():
+    return prober.livez()
+
+
+# Probes are answered on the event loop from the cached report, so they
+# never wait for a threadpool slot or call BigQuery
+@app.get("/readyz")
 @app.get("/health")
-def health():
-    return {"status": "healthy", "bigquery": "connected"}
+async def readyz():
+    status_code, body = prober.readyz()
+    return JSONResponse(body, status_code=status_code)
 
 
 @app.post("/analytics/scan")
 def log_scan(body: schemas.ScanEvent):
-    bigquery_client.log_scan(body.username, body.ip_address)
+    store.log_scan(body.username, body.ip_address)
     return {"status": "scan logged", "username": body.username}
 
 
 @app.get("/analytics/{username}/stats", response_model=schemas.ScanStatsResponse)
 def get_stats(username: str):
-    stats = bigquery_client.get_scan_stats(username)
+    stats = store.get_scan_stats(username)
     return schemas.ScanStatsResponse(username=username, **stats)
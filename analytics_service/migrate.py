@@ -0,0 +1,23 @@
+"""
+Schema setup for the MeetMii analytics service.
+
+Creates the dataset and scan_events table in the store selected by
+ANALYTICS_STORE. Run it once per deploy when the service runs with
+AUTO_CREATE_SCHEMA=false, so instances skip the BigQuery calls at boot.
+
+Usage:
+    python migrate.py
+"""
+
+import backends
+
+
+def main():
+    store = backends.load_store()
+    store.get_or_create_dataset()
+    store.get_or_create_table()
+    print(f"Schema up to date in {store.__name__}")
+
+
+if __name__ == "__main__":
+    main()
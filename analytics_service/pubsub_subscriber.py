@@ -2,26 +2,74 @@
 Pub/Sub subscriber for the MeetMii analytics service.
 
 Listens to the qr-scanned subscription in a background thread and
-writes each received scan event to BigQuery via bigquery_client.log_scan.
+writes each received scan event to the configured store's log_scan
+(BigQuery by default, see backends.py). Failed writes are nacked and
+redelivered instead of being lost.
 Running in a background thread means the subscriber never blocks the
 FastAPI event loop.
+
+status reports whether the streaming pull is running and the subscription
+lag: how long the last received message waited between its publish_time
+and delivery. main.py serves it in /readyz; more than
+SUBSCRIPTION_MAX_LAG_SECONDS of lag marks the instance not ready, until
+that much time has passed without a message (the backlog has drained).
 """
 
 import os
 import json
 import logging
 import threading
+import time
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from google.cloud import pubsub_v1
-import bigquery_client
+import backends
+import metrics
 
 load_dotenv()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 SUBSCRIPTION_NAME = os.getenv("PUBSUB_SUBSCRIPTION_NAME")
+SUBSCRIPTION_MAX_LAG_SECONDS = float(os.getenv("SUBSCRIPTION_MAX_LAG_SECONDS", "300"))
+
+store = backends.load_store()
 
 logger = logging.getLogger(__name__)
 
+_streaming_pull_future = None
+# Lag of the last received message and when it arrived (monotonic)
+_last_lag = None
+_last_received = None
+
+
+@metrics.timed("pubsub", "process_message")
+def process_message(message) -> None:
+    """Decode a Pub/Sub message and log the scan to the store.
+
+    The row keeps the message's scanned_at and event_id, so a redelivered
+    or replayed event is stored once and at the time of the scan. A message
+    that cannot be decoded is acked, as retrying cannot fix it; one the
+    store fails to write is nacked so Pub/Sub redelivers it.
+    """
+    global _last_lag, _last_received
+    publish_time = getattr(message, "publish_time", None)
+    if publish_time is not None:
+        _last_lag = (datetime.now(timezone.utc) - publish_time).total_seconds()
+        _last_received = time.monotonic()
+    try:
+        row = backends.scan_row(json.loads(message.data.decode("utf-8")))
+    except Exception as e:
+        logger.error("Dropping malformed Pub/Sub message: %s", e)
+        message.ack()
+        return
+    try:
+        store.log_scan(row["username"], row["ip_address"], scanned_at=row["scanned_at"], event_id=row["event_id"])
+    except Exception as e:
+        logger.error("Failed to store scan event for username=%s: %s", row["username"], e)
+        message.nack()
+        return
+    message.ack()
+    logger.info("Processed scan event for username=%s", row["username"])
+
 
 def start_subscriber() -> None:
     """Start a streaming Pub/Sub pull subscription in a background thread.
@@ -29,24 +77,18 @@ def start_subscriber() -> None:
     Creates a SubscriberClient and registers process_message as the callback
     for every message on the analytics-subscription subscription. The
     streaming pull runs in a daemon thread so it stops automatically when
-    the process exits.
+    the process exits. google.cloud.pubsub_v1 is imported here rather than
+    at module load, so it stays off the import path when Pub/Sub is unused.
     """
+    from google.cloud import pubsub_v1
+
+    global _streaming_pull_future
     subscriber = pubsub_v1.SubscriberClient()
     subscription_path = subscriber.subscription_path(PROJECT_ID, SUBSCRIPTION_NAME)
 
-    def process_message(message) -> None:
-        """Decode a Pub/Sub message and log the scan to BigQuery."""
-        try:
-            data = json.loads(message.data.decode("utf-8"))
-            username = data["username"]
-            bigquery_client.log_scan(username, None)
-            message.ack()
-            logger.info("Processed scan event for username=%s", username)
-        except Exception as e:
-            logger.error("Failed to process Pub/Sub message: %s", e)
-            message.ack()
-
-    streaming_pull_future = subscriber.subscribe(subscription_path, callback=process_message)
+    streaming_pull_future = _streaming_pull_future = subscriber.subscribe(
+        subscription_path, callback=process_message
+    )
     logger.info("Listening for Pub/Sub messages on %s", subscription_path)
 
     def run():
@@ -58,3 +100,19 @@ def start_subscriber() -> None:
 
     thread = threading.Thread(target=run, daemon=True)
     thread.start()
+
+
+def status() -> dict:
+    """Return the subscriber health check used by /readyz."""
+    if not SUBSCRIPTION_NAME:
+        return {"ok": True, "enabled": False}
+    running = _streaming_pull_future is not None and not _streaming_pull_future.done()
+    lag = _last_lag
+    idle = None if _last_received is None else time.monotonic() - _last_received
+    behind = lag is not None and lag > SUBSCRIPTION_MAX_LAG_SECONDS and idle < SUBSCRIPTION_MAX_LAG_SECONDS
+    return {
+        "ok": running and not behind,
+        "running": running,
+        "lag_seconds": None if lag is None else round(lag, 3),
+        "last_message_seconds_ago": None if idle is None else round(idle, 1),
+    }
@@ -0,0 +1,114 @@
+"""
+Scan event replay and backfill for the MeetMii analytics service.
+
+Streams scan events from JSON-lines files into scan_events in the store
+selected by ANALYTICS_STORE. Use it to restore scans lost while the
+subscriber was down or failing, from profile_service spool segments
+(SPOOL_DIR), or to backfill from any export with one event per line:
+
+    {"event_id": "...", "username": "alice", "scanned_at": "2025-03-01T09:30:00+00:00"}
+
+event_id is optional; one is derived from username and scanned_at when
+missing (see backends.scan_row). Files ending in .gz are decompressed on the
+fly, and directories are searched for *.jsonl and *.jsonl.gz files.
+
+Rows are sent in --batch-size batches; BigQuery loads them with --workers
+parallel load jobs and merges them in one statement at the end. Events whose
+event_id is already stored are skipped, so replaying overlapping windows or
+the same files twice never double counts. --since and --until (ISO 8601,
+UTC when no offset is given) restrict the replay to an outage window.
+
+Usage:
+    python replay.py /var/spool/meetmii
+    python replay.py --since 2025-03-01T09:00 --until 2025-03-01T12:00 spool/ export.jsonl.gz
+"""
+
+import argparse
+import glob
+import gzip
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+import backends
+
+
+def _paths(inputs: list[str]):
+    for path in inputs:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "*.jsonl")) + glob.glob(os.path.join(path, "*.jsonl.gz")))
+        else:
+            yield path
+
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _utc(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def read_rows(inputs: list[str], since: datetime = None, until: datetime = None, stats: dict = None):
+    """Yield a scan_events row for every event in inputs within [since, until)."""
+    stats = stats if stats is not None else {}
+    stats.setdefault("read", 0)
+    stats.setdefault("malformed", 0)
+    for path in _paths(inputs):
+        with _open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = backends.scan_row(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    # A torn last line of a segment written during a crash
+                    stats["malformed"] += 1
+                    continue
+                if (since and row["scanned_at"] < since) or (until and row["scanned_at"] >= until):
+                    continue
+                stats["read"] += 1
+                yield row
+
+
+def _batches(rows, size: int):
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="JSON-lines files or directories of them")
+    parser.add_argument("--since", type=_utc, help="skip events scanned before this time")
+    parser.add_argument("--until", type=_utc, help="skip events scanned at or after this time")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=8, help="parallel BigQuery load jobs")
+    args = parser.parse_args()
+
+    store = backends.load_store()
+    store.get_or_create_table()
+
+    stats = {}
+    start = time.perf_counter()
+    rows = read_rows(args.inputs, args.since, args.until, stats)
+    inserted = store.import_scans(_batches(rows, args.batch_size), workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"Read {stats['read']:,} events in {elapsed:.1f}s ({stats['read'] / max(elapsed, 1e-9):,.0f}/s): "
+        f"{inserted:,} inserted, {stats['read'] - inserted:,} duplicates skipped, "
+        f"{stats['malformed']:,} malformed lines skipped",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Backend selection for the MeetMii insights service.
+
+- INSIGHTS_STORE: "bigquery" (default) uses bigquery_client; "local" uses the
+                  SQLite stand-in in local_store.
+
+- INSIGHTS_LLM: "gemini" (default) uses gemini_client; "fake" uses
+                fake_gemini with simulated latency and errors.
+
+Modules are imported only when selected, so the local backends never build
+a BigQuery client or configure the Gemini SDK.
+"""
+
+import os
+import importlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_STORES = {"bigquery": "bigquery_client", "local": "local_store"}
+_LLMS = {"gemini": "gemini_client", "fake": "fake_gemini"}
+
+
+def _load(choices: dict, variable: str, default: str):
+    name = os.getenv(variable, default)
+    if name not in choices:
+        raise ValueError(f"{variable} must be one of {sorted(choices)}, got {name!r}")
+    return importlib.import_module(choices[name])
+
+
+def load_store():
+    """Return the scan and insight storage module selected by INSIGHTS_STORE."""
+    return _load(_STORES, "INSIGHTS_STORE", "bigquery")
+
+
+def load_llm():
+    """Return the insight generation module selected by INSIGHTS_LLM."""
+    return _load(_LLMS, "INSIGHTS_LLM", "gemini")
@@ -0,0 +1,72 @@
+"""
+Offline benchmark for the weekly insights pipeline.
+
+Runs pipeline.run against local_store (SQLite seeded with synthetic
+scan_events) and fake_gemini, so it needs neither BigQuery nor Gemini.
+For each user count it reports end-to-end users/sec, p50/p99 latency of
+every pipeline stage and the number of store queries issued.
+
+Usage:
+    python bench_insights.py
+    python bench_insights.py --users 1000 10000 --latency-ms 5 --error-rate 0.02
+"""
+
+import os
+
+os.environ["INSIGHTS_STORE"] = "local"
+os.environ["INSIGHTS_LLM"] = "fake"
+
+import argparse
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+
+import backends
+import pipeline
+
+store = backends.load_store()
+llm = backends.load_llm()
+
+
+def bench(n_users: int, scans_per_user: int) -> None:
+    store.reset()
+    store.seed_scan_events(n_users, scans_per_user, datetime.now(timezone.utc))
+    llm.call_count = llm.error_count = 0
+
+    durations = defaultdict(list)
+    start = time.perf_counter()
+    processed = pipeline.run(store, llm, on_stage=lambda stage, seconds: durations[stage].append(seconds))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{n_users:,} users, {n_users * scans_per_user:,} scans")
+    print(f"  {processed / elapsed:,.0f} users/s ({elapsed:.2f}s total)")
+    print(f"  store queries: {store.query_count:,}, llm calls: {llm.call_count:,} ({llm.error_count:,} failed)")
+    print(f"  {'stage':<12} {'calls':>8} {'p50 ms':>9} {'p99 ms':>9} {'total s':>9}")
+    for stage, samples in durations.items():
+        ms = np.array(samples) * 1000
+        print(
+            f"  {stage:<12} {len(ms):>8,} {np.percentile(ms, 50):>9.3f} "
+            f"{np.percentile(ms, 99):>9.3f} {ms.sum() / 1000:>9.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--scans-per-user", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated Gemini latency per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="simulated Gemini failure rate (0-1)")
+    args = parser.parse_args()
+
+    # Simulated failures are expected here, keep them out of the report
+    logging.getLogger(llm.__name__).setLevel(logging.CRITICAL)
+    llm.configure(args.latency_ms, args.error_rate)
+    for n_users in args.users:
+        bench(n_users, args.scans_per_user)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark for scan_stats.compute_user_features.
+
+Generates synthetic scan_events rows and compares the vectorised feature
+engine against the old per-user loop, which ran four filtered queries per
+user (this week, last week, busiest day, busiest hour). The loop is replayed
+here as four boolean filters over the same frame, so both sides see
+identical data and no BigQuery access is needed. Also checks that both
+produce the same values for the four legacy fields.
+
+Usage:
+    python bench_scan_stats.py --users 1000 --scans-per-user 40
+    python bench_scan_stats.py --users 100000 --skip-loop
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+import scan_stats
+
+
+def synthetic_events(n_users: int, scans_per_user: int, now: datetime, seed: int = 0) -> pd.DataFrame:
+    """Return a frame of random scans spread over the last WINDOW_DAYS days."""
+    rng = np.random.default_rng(seed)
+    n_rows = n_users * scans_per_user
+    users = rng.zipf(1.3, n_rows) % n_users
+    offsets = rng.integers(0, scan_stats.WINDOW_DAYS * 24 * 3600, n_rows)
+    return pd.DataFrame({
+        "username": np.char.add("user", users.astype(str)),
+        "scanned_at": pd.Timestamp(now) - pd.to_timedelta(offsets, unit="s"),
+    })
+
+
+def per_user_loop(events: pd.DataFrame, now: datetime) -> dict[str, dict]:
+    """Reproduce bigquery_client.get_weekly_scan_data once per user."""
+    week_ago = pd.Timestamp(now - timedelta(days=7))
+    two_weeks_ago = pd.Timestamp(now - timedelta(days=14))
+    results = {}
+    for username in events["username"].unique():
+        mine = events["username"] == username
+        this_week = events[mine & (events["scanned_at"] >= week_ago)]
+        last_week = events[
+            mine & (events["scanned_at"] >= two_weeks_ago) & (events["scanned_at"] < week_ago)
+        ]
+        days = this_week["scanned_at"].dt.dayofweek
+        hours = this_week["scanned_at"].dt.hour
+        results[username] = {
+            "total_scans_this_week": len(this_week),
+            "total_scans_last_week": len(last_week),
+            "busiest_day": scan_stats.DAY_NAMES[days.value_counts().idxmax()] if len(days) else "",
+            "busiest_hour": int(hours.value_counts().idxmax()) if len(hours) else 0,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--scans-per-user", type=int, default=40)
+    parser.add_argument("--skip-loop", action="store_true", help="only time the vectorised engine")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    events = synthetic_events(args.users, args.scans_per_user, now)
+    print(f"{len(events):,} scan rows, {events['username'].nunique():,} users")
+
+    start = time.perf_counter()
+    features = scan_stats.compute_user_features(events, now)
+    vectorised = time.perf_counter() - start
+    print(f"vectorised engine: {vectorised:.3f}s ({len(features) / vectorised:,.0f} users/s)")
+
+    if args.skip_loop:
+        return
+
+    start = time.perf_counter()
+    expected = per_user_loop(events, now)
+    looped = time.perf_counter() - start
+    print(f"per-user loop:     {looped:.3f}s ({len(expected) / looped:,.0f} users/s)")
+    print(f"speedup:           {looped / vectorised:.1f}x")
+
+    mismatches = 0
+    for username, legacy in expected.items():
+        counts_match = all(features[username][key] == legacy[key] for key in (
+            "total_scans_this_week", "total_scans_last_week",
+        ))
+        # Ties for busiest day or hour may resolve differently, so compare counts
+        heatmap = np.array(features[username]["hour_of_week"]).reshape(7, 24)
+        day_index = scan_stats.DAY_NAMES.index(legacy["busiest_day"]) if legacy["busiest_day"] else 0
+        peaks_match = (
+            heatmap.sum(axis=1).max() == heatmap.sum(axis=1)[day_index]
+            and heatmap.sum(axis=0).max() == heatmap.sum(axis=0)[legacy["busiest_hour"]]
+        )
+        if not (counts_match and peaks_match):
+            mismatches += 1
+    print(f"mismatched users:  {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
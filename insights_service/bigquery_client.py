@@ -3,27 +3,50 @@ BigQuery client for the MeetMii insights service.
 
 Reads from the existing scan_events table (written by analytics_service)
 and writes generated insights to the weekly_insights table.
+
+The google.cloud.bigquery import and the client itself are deferred to
+get_client, so importing this module makes no network calls. pandas is
+only imported by get_scan_events_frame, keeping it off the cold start. The
+weekly_insights table is created before the first save unless
+AUTO_CREATE_SCHEMA=false, in which case run migrate.py at deploy time.
 """
 
 import os
+import threading
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-from google.cloud import bigquery
-from google.cloud.exceptions import Conflict
+import metrics
 
 load_dotenv()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 DATASET_ID = os.getenv("BIGQUERY_DATASET_ID")
+AUTO_CREATE_SCHEMA = os.getenv("AUTO_CREATE_SCHEMA", "true").lower() == "true"
 
-client = bigquery.Client(project=PROJECT_ID)
+_client = None
+_client_lock = threading.Lock()
+_schema_lock = threading.Lock()
+_insights_table_ready = not AUTO_CREATE_SCHEMA
 
 SCAN_TABLE = f"`{PROJECT_ID}.{DATASET_ID}.scan_events`"
 INSIGHTS_TABLE = f"`{PROJECT_ID}.{DATASET_ID}.weekly_insights`"
 INSIGHTS_TABLE_REF = f"{PROJECT_ID}.{DATASET_ID}.weekly_insights"
 
 
-def _ensure_insights_table():
+def get_client():
+    """Return the shared BigQuery client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.cloud import bigquery
+
+                _client = bigquery.Client(project=PROJECT_ID)
+    return _client
+
+
+@metrics.timed("bigquery", "ensure_insights_table")
+def ensure_insights_table():
     """Create the weekly_insights table if it does not already exist.
 
     Schema:
@@ -32,6 +55,9 @@ def _ensure_insights_table():
       - week_start:   TIMESTAMP, required
       - generated_at: TIMESTAMP, required
     """
+    from google.cloud import bigquery
+    from google.cloud.exceptions import Conflict
+
     schema = [
         bigquery.SchemaField("username", "STRING", mode="REQUIRED"),
         bigquery.SchemaField("insight", "STRING", mode="REQUIRED"),
@@ -40,14 +66,12 @@ def _ensure_insights_table():
     ]
     table = bigquery.Table(INSIGHTS_TABLE_REF, schema=schema)
     try:
-        client.create_table(table)
+        get_client().create_table(table)
     except Conflict:
         pass
 
 
-_ensure_insights_table()
-
-
+@metrics.timed("bigquery", "get_all_usernames")
 def get_all_usernames() -> list[str]:
     """Return a list of every distinct username found in scan_events.
 
@@ -55,10 +79,30 @@ def get_all_usernames() -> list[str]:
     least one recorded scan. Returns an empty list if the table is empty.
     """
     query = f"SELECT DISTINCT username FROM {SCAN_TABLE}"
-    rows = list(client.query(query).result())
+    rows = list(get_client().query(query).result())
     return [row.username for row in rows]
 
 
+@metrics.timed("bigquery", "get_scan_events_frame")
+def get_scan_events_frame(since: datetime) -> "pandas.DataFrame":
+    """Return every scan since the given time as one columnar result set.
+
+    Selects only the username and scanned_at columns from scan_events and
+    downloads the result as Arrow through the BigQuery Storage API, so the
+    whole window arrives in a single query instead of several per user.
+    Feed the frame to scan_stats.compute_user_features.
+    """
+    import pandas  # noqa: F401  to_dataframe needs it; fail before running the query
+    from google.cloud import bigquery
+
+    query = f"SELECT username, scanned_at FROM {SCAN_TABLE} WHERE scanned_at >= @since"
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ScalarQueryParameter("since", "TIMESTAMP", since)]
+    )
+    return get_client().query(query, job_config=job_config).to_dataframe()
+
+
+@metrics.timed("bigquery", "get_weekly_scan_data")
 def get_weekly_scan_data(username: str) -> dict:
     """Return scan statistics for the past two weeks for a given username.
 
@@ -71,6 +115,9 @@ def get_weekly_scan_data(username: str) -> dict:
     Returns a dict with those four keys. Returns zeros and empty strings
     if the username has no scans in the relevant windows.
     """
+    from google.cloud import bigquery
+
+    client = get_client()
     param = bigquery.ScalarQueryParameter("username", "STRING", username)
 
     def run_count(where: str) -> int:
@@ -120,12 +167,20 @@ def get_weekly_scan_data(username: str) -> dict:
     }
 
 
+@metrics.timed("bigquery", "save_insight")
 def save_insight(username: str, insight: str, week_start: datetime) -> None:
     """Insert a generated insight row into the weekly_insights table.
 
     Sets generated_at to the current UTC timestamp. The week_start parameter
     marks which week the insight covers. Raises RuntimeError if the insert fails.
     """
+    global _insights_table_ready
+    if not _insights_table_ready:
+        with _schema_lock:
+            if not _insights_table_ready:
+                ensure_insights_table()
+                _insights_table_ready = True
+
     rows = [
         {
             "username": username,
@@ -134,11 +189,12 @@ def save_insight(username: str, insight: str, week_start: datetime) -> None:
             "generated_at": datetime.now(timezone.utc).isoformat(),
         }
     ]
-    errors = client.insert_rows_json(INSIGHTS_TABLE_REF, rows)
+    errors = get_client().insert_rows_json(INSIGHTS_TABLE_REF, rows)
     if errors:
         raise RuntimeError(f"BigQuery insert failed: {errors}")
 
 
+@metrics.timed("bigquery", "get_latest_insight")
 def get_latest_insight(username: str) -> str | None:
     """Return the most recently generated insight for a given username.
 
@@ -146,6 +202,8 @@ def get_latest_insight(username: str) -> str | None:
     the insight text of the first row. Returns None if no insight exists
     for that username yet.
     """
+    from google.cloud import bigquery
+
     param = bigquery.ScalarQueryParameter("username", "STRING", username)
     query = f"""
         SELECT insight
@@ -154,5 +212,5 @@ def get_latest_insight(username: str) -> str | None:
         ORDER BY generated_at DESC
         LIMIT 1
     """
-    rows = list(client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=[param])).result())
+    rows = list(get_client().query(query, job_config=bigquery.QueryJobConfig(query_parameters=[param])).result())
     return rows[0].insight if rows else None
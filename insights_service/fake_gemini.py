@@ -0,0 +1,53 @@
+"""
+Fake Gemini client for running the insights pipeline offline.
+
+Exposes the same generate_insight function as gemini_client without calling
+the Gemini API. Each call sleeps for FAKE_GEMINI_LATENCY_MS milliseconds and
+fails with probability FAKE_GEMINI_ERROR_RATE, in which case it falls back to
+DEFAULT_INSIGHT exactly like the real client does.
+
+Selected with INSIGHTS_LLM=fake (see backends.py).
+"""
+
+import os
+import random
+import time
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+latency_ms = float(os.getenv("FAKE_GEMINI_LATENCY_MS", "0"))
+error_rate = float(os.getenv("FAKE_GEMINI_ERROR_RATE", "0"))
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INSIGHT = (
+    "Keep sharing your MeetMii card — every connection starts with a scan!"
+)
+
+call_count = 0
+error_count = 0
+
+
+def configure(latency: float, errors: float) -> None:
+    """Override the simulated latency (milliseconds) and error rate (0-1)."""
+    global latency_ms, error_rate
+    latency_ms = latency
+    error_rate = errors
+
+
+def generate_insight(username: str, scan_data: dict) -> str:
+    """Return a canned insight built from scan_data after a simulated delay."""
+    global call_count, error_count
+    call_count += 1
+    if latency_ms:
+        time.sleep(latency_ms / 1000)
+    if error_rate and random.random() < error_rate:
+        error_count += 1
+        logger.error("Simulated Gemini failure for username=%s", username)
+        return DEFAULT_INSIGHT
+    return (
+        f"{username} got {scan_data['total_scans_this_week']} scans this week, "
+        f"mostly on {scan_data['busiest_day'] or 'no particular day'}."
+    )
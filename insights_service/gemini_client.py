@@ -3,18 +3,23 @@ Gemini AI client for the MeetMii insights service.
 
 Uses google-generativeai to generate short, personalized weekly
 networking insights for each user based on their scan data.
+
+The SDK is imported and configured on the first generate_insight call
+rather than at import time, so it adds nothing to a cold start.
 """
 
 import os
 import logging
-import google.generativeai as genai
+import threading
 from dotenv import load_dotenv
+import metrics
 
 load_dotenv()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+MODEL_NAME = "gemini-3-flash-preview"
 
-model = genai.GenerativeModel("gemini-3-flash-preview")
+_model = None
+_model_lock = threading.Lock()
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +28,19 @@ DEFAULT_INSIGHT = (
 )
 
 
+def get_model():
+    """Return the shared GenerativeModel, configuring the SDK on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
+
+
 def generate_insight(username: str, scan_data: dict) -> str:
     """Generate a short personalized weekly insight for a user using Gemini.
 
@@ -33,12 +51,16 @@ def generate_insight(username: str, scan_data: dict) -> str:
 
     Args:
         username:  The MeetMii username the insight is for.
-        scan_data: Dict with keys total_scans_this_week, total_scans_last_week,
-                   busiest_day, and busiest_hour.
+        scan_data: Feature dict from scan_stats.compute_user_features. Uses
+                   total_scans_this_week, total_scans_last_week,
+                   week_over_week_change, busiest_day, busiest_hour,
+                   current_streak_days, longest_streak_days and peak_window.
 
     Returns:
         A plain-text insight string (2-3 sentences).
     """
+    change = scan_data.get("week_over_week_change")
+    peak = scan_data.get("peak_window")
     prompt = f"""You are a networking coach for a professional networking app called MeetMii. \
 Generate a short, friendly, personalized weekly insight for user {username} based on their QR code scan data.
 
@@ -47,12 +69,17 @@ Their data this week:
 - Total scans last week: {scan_data['total_scans_last_week']}
 - Busiest day: {scan_data['busiest_day'] or 'N/A'}
 - Busiest hour: {scan_data['busiest_hour']}:00
+- Week-over-week change: {f"{change:+.1f}%" if change is not None else 'N/A'}
+- Current streak: {scan_data.get('current_streak_days', 0)} days with scans in a row
+- Longest streak in the last two weeks: {scan_data.get('longest_streak_days', 0)} days
+- Peak window: {f"{peak['day']} from {peak['start_hour']}:00 ({peak['scans']} scans)" if peak else 'N/A'}
 
 Write 2-3 sentences. Be encouraging, specific, and actionable. \
 Do not use bullet points. Do not use markdown. Just plain conversational text."""
 
     try:
-        response = model.generate_content(prompt)
+        with metrics.timed("gemini", "generate_content"):
+            response = get_model().generate_content(prompt)
         return response.text.strip()
     except Exception as e:
         logger.error("Gemini generation failed for username=%s: %s", username, e)
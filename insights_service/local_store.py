@@ -0,0 +1,164 @@
+"""
+Local SQLite stand-in for the insights service's BigQuery client.
+
+Exposes the same functions as bigquery_client so main.py can run without a
+GCP project, credentials or network access. scan_events and weekly_insights
+live in a SQLite database at LOCAL_STORE_PATH (":memory:" by default) with
+scanned_at stored as UTC epoch seconds.
+
+Selected with INSIGHTS_STORE=local (see backends.py). Also counts every
+query it runs in query_count so benchmarks can report round trips. numpy and pandas are
+imported by the functions that use them, so serving reads does not load
+them.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", ":memory:")
+
+_conn = sqlite3.connect(LOCAL_STORE_PATH, check_same_thread=False)
+_lock = threading.Lock()
+
+query_count = 0
+
+_conn.executescript(
+    """
+    CREATE TABLE IF NOT EXISTS scan_events (
+        username   TEXT NOT NULL,
+        scanned_at REAL NOT NULL,
+        ip_address TEXT
+    );
+    CREATE INDEX IF NOT EXISTS ix_scan_events_username_scanned_at
+        ON scan_events (username, scanned_at);
+    CREATE TABLE IF NOT EXISTS weekly_insights (
+        username     TEXT NOT NULL,
+        insight      TEXT NOT NULL,
+        week_start   REAL NOT NULL,
+        generated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_weekly_insights_username_generated_at
+        ON weekly_insights (username, generated_at);
+    """
+)
+
+
+def _query(sql: str, params: tuple = ()) -> list[tuple]:
+    """Run one statement under the connection lock and count it."""
+    global query_count
+    with _lock:
+        query_count += 1
+        rows = _conn.execute(sql, params).fetchall()
+        _conn.commit()
+    return rows
+
+
+def reset() -> None:
+    """Delete every row from both tables and zero query_count."""
+    global query_count
+    with _lock:
+        _conn.execute("DELETE FROM scan_events")
+        _conn.execute("DELETE FROM weekly_insights")
+        _conn.commit()
+        query_count = 0
+
+
+def seed_scan_events(n_users: int, scans_per_user: int, now: datetime, seed: int = 0) -> None:
+    """Insert synthetic scans for n_users users spread over the last two weeks.
+
+    Scan counts per user follow a Zipf distribution so a few users are much
+    busier than the rest, like real traffic. Seeding does not count towards
+    query_count.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n_rows = n_users * scans_per_user
+    users = np.concatenate([np.arange(n_users), rng.zipf(1.3, n_rows - n_users) % n_users])
+    scanned_at = now.timestamp() - rng.integers(0, 14 * 24 * 3600, n_rows)
+    rows = zip((f"user{u}" for u in users.tolist()), scanned_at.tolist())
+    with _lock:
+        _conn.executemany("INSERT INTO scan_events (username, scanned_at) VALUES (?, ?)", rows)
+        _conn.commit()
+
+
+def get_all_usernames() -> list[str]:
+    """Return a list of every distinct username found in scan_events."""
+    return [row[0] for row in _query("SELECT DISTINCT username FROM scan_events")]
+
+
+def get_scan_events_frame(since: datetime) -> "pandas.DataFrame":
+    """Return every scan since the given time as a (username, scanned_at) frame."""
+    import pandas as pd
+
+    rows = _query(
+        "SELECT username, scanned_at FROM scan_events WHERE scanned_at >= ?",
+        (since.timestamp(),),
+    )
+    frame = pd.DataFrame(rows, columns=["username", "scanned_at"])
+    frame["scanned_at"] = pd.to_datetime(frame["scanned_at"], unit="s", utc=True)
+    return frame
+
+
+def get_weekly_scan_data(username: str) -> dict:
+    """Return the same four statistics as bigquery_client.get_weekly_scan_data."""
+    now = datetime.now(timezone.utc)
+    week_ago = (now - timedelta(days=7)).timestamp()
+    two_weeks_ago = (now - timedelta(days=14)).timestamp()
+
+    this_week = _query(
+        "SELECT COUNT(*) FROM scan_events WHERE username = ? AND scanned_at >= ?",
+        (username, week_ago),
+    )[0][0]
+    last_week = _query(
+        "SELECT COUNT(*) FROM scan_events WHERE username = ? AND scanned_at >= ? AND scanned_at < ?",
+        (username, two_weeks_ago, week_ago),
+    )[0][0]
+    day_rows = _query(
+        """
+        SELECT CAST(strftime('%w', scanned_at, 'unixepoch') AS INTEGER) AS day, COUNT(*) AS n
+        FROM scan_events WHERE username = ? AND scanned_at >= ?
+        GROUP BY day ORDER BY n DESC LIMIT 1
+        """,
+        (username, week_ago),
+    )
+    hour_rows = _query(
+        """
+        SELECT CAST(strftime('%H', scanned_at, 'unixepoch') AS INTEGER) AS hour, COUNT(*) AS n
+        FROM scan_events WHERE username = ? AND scanned_at >= ?
+        GROUP BY hour ORDER BY n DESC LIMIT 1
+        """,
+        (username, week_ago),
+    )
+    # SQLite numbers days from Sunday = 0
+    day_names = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+    return {
+        "total_scans_this_week": this_week,
+        "total_scans_last_week": last_week,
+        "busiest_day": day_names[day_rows[0][0]] if day_rows else "",
+        "busiest_hour": hour_rows[0][0] if hour_rows else 0,
+    }
+
+
+def save_insight(username: str, insight: str, week_start: datetime) -> None:
+    """Insert a generated insight row into the weekly_insights table."""
+    _query(
+        "INSERT INTO weekly_insights (username, insight, week_start, generated_at) VALUES (?, ?, ?, ?)",
+        (username, insight, week_start.timestamp(), datetime.now(timezone.utc).timestamp()),
+    )
+
+
+def get_latest_insight(username: str) -> str | None:
+    """Return the most recently generated insight for a given username."""
+    rows = _query(
+        "SELECT insight FROM weekly_insights WHERE username = ? ORDER BY generated_at DESC LIMIT 1",
+        (username,),
+    )
+    return rows[0][0] if rows else None
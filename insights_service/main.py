@@ -1,9 +1,12 @@
-from datetime import datetime, timezone
 from fastapi import FastAPI
-import bigquery_client
-import gemini_client
+import backends
+import metrics
+
+store = backends.load_store()
+llm = backends.load_llm()
 
 app = FastAPI()
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 @app.get("/")
@@ -11,29 +14,28 @@ def root():
     return {"message": "MeetMii insights service is running"}
 
 
+@app.get("/metrics")
+def prometheus_metrics():
+    return metrics.metrics_response()
+
+
 @app.post("/insights/generate")
 def generate_insights():
     """Generate and store weekly insights for every user with scan data.
 
-    Fetches all distinct usernames from BigQuery, pulls their weekly scan
-    statistics, generates a personalised insight via Gemini, and saves the
-    result back to the weekly_insights table.
+    Fetches all distinct usernames from BigQuery, pulls the last two weeks
+    of scans for every user in one query, computes each user's engagement
+    features with scan_stats, generates a personalised insight via Gemini,
+    and saves the result back to the weekly_insights table.
 
     Intended to be called by Cloud Scheduler once per week.
     Returns a count of how many users were processed.
     """
-    usernames = bigquery_client.get_all_usernames()
-    week_start = datetime.now(timezone.utc).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-    count = 0
-
-    for username in usernames:
-        scan_data = bigquery_client.get_weekly_scan_data(username)
-        insight = gemini_client.generate_insight(username, scan_data)
-        bigquery_client.save_insight(username, insight, week_start)
-        count += 1
+    # pipeline pulls in scan_stats and with it pandas, numpy and pyarrow;
+    # imported here so cold starts serving GET /insights/{username} skip them
+    import pipeline
 
+    count = pipeline.run(store, llm)
     return {"status": "done", "users_processed": count}
 
 
@@ -45,7 +47,7 @@ def get_insight(username: str):
     If no insight has been generated yet, returns a default prompt encouraging
     them to start sharing their card.
     """
-    insight = bigquery_client.get_latest_insight(username)
+    insight = store.get_latest_insight(username)
 
     if not insight:
         insight = (
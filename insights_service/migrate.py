@@ -0,0 +1,21 @@
+"""
+Schema setup for the MeetMii insights service.
+
+Creates the weekly_insights BigQuery table. Run it once per deploy when
+the service runs with AUTO_CREATE_SCHEMA=false, so the first save does not
+have to check for the table.
+
+Usage:
+    python migrate.py
+"""
+
+import bigquery_client
+
+
+def main():
+    bigquery_client.ensure_insights_table()
+    print(f"Schema up to date: {bigquery_client.INSIGHTS_TABLE_REF}")
+
+
+if __name__ == "__main__":
+    main()
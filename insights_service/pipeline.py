@@ -0,0 +1,52 @@
+"""
+Weekly insight generation pipeline for the MeetMii insights service.
+
+Shared by the POST /insights/generate endpoint and bench_insights.py. The
+store and llm arguments are modules chosen by backends.py, so the same code
+runs against BigQuery and Gemini in production and against local stand-ins
+in benchmarks.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import scan_stats
+
+
+def run(store, llm, on_stage: Optional[Callable[[str, float], None]] = None) -> int:
+    """Generate and save this week's insight for every user with scan data.
+
+    Stages, in order:
+      - usernames:   store.get_all_usernames, once
+      - scan_events: store.get_scan_events_frame for the stats window, once
+      - features:    scan_stats.compute_user_features, once
+      - generate:    llm.generate_insight, once per user
+      - save:        store.save_insight, once per user
+
+    If on_stage is given it is called with the stage name and its duration
+    in seconds after every stage call. Returns the number of users processed.
+    """
+
+    def timed(stage: str, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        if on_stage:
+            on_stage(stage, time.perf_counter() - start)
+        return result
+
+    now = datetime.now(timezone.utc)
+    week_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    usernames = timed("usernames", store.get_all_usernames)
+    events = timed("scan_events", store.get_scan_events_frame, scan_stats.window_start(now))
+    features = timed("features", scan_stats.compute_user_features, events, now)
+    count = 0
+
+    for username in usernames:
+        scan_data = features.get(username) or scan_stats.empty_features()
+        insight = timed("generate", llm.generate_insight, username, scan_data)
+        timed("save", store.save_insight, username, insight, week_start)
+        count += 1
+
+    return count
@@ -0,0 +1,155 @@
+"""
+Vectorised per-user engagement features for the MeetMii insights service.
+
+Works on a single columnar result set of (username, scanned_at) rows covering
+the last WINDOW_DAYS days, as returned by
+bigquery_client.get_scan_events_frame, and computes every user's features in
+one pass with NumPy group operations instead of one set of queries per user.
+
+Features per user:
+  - total_scans_this_week / total_scans_last_week: scans in the last 7 days
+    and in the 7 days before that
+  - week_over_week_change: percentage change between the two weeks, or None
+    when there were no scans last week
+  - busiest_day / busiest_hour: day-of-week name and hour of day (UTC) with
+    the most scans this week
+  - hour_of_week: 168 scan counts for this week, Monday 00:00 first
+  - current_streak_days / longest_streak_days: consecutive UTC calendar days
+    with at least one scan
+  - peak_window: the busiest PEAK_WINDOW_HOURS-hour stretch of this week
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+WINDOW_DAYS = 14
+PEAK_WINDOW_HOURS = 3
+HOURS_PER_WEEK = 7 * 24
+
+DAY_NAMES = [
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday",
+]
+
+
+def empty_features() -> dict:
+    """Return the feature dict for a user with no scans in the window."""
+    return {
+        "total_scans_this_week": 0,
+        "total_scans_last_week": 0,
+        "week_over_week_change": None,
+        "busiest_day": "",
+        "busiest_hour": 0,
+        "hour_of_week": [0] * HOURS_PER_WEEK,
+        "current_streak_days": 0,
+        "longest_streak_days": 0,
+        "peak_window": None,
+    }
+
+
+def compute_user_features(events: pd.DataFrame, now: datetime) -> dict[str, dict]:
+    """Compute engagement features for every username in events.
+
+    Args:
+        events: DataFrame with a username column and a scanned_at column of
+                timestamps. Rows older than WINDOW_DAYS are ignored.
+        now:    Timezone-aware reference time the windows are measured from.
+
+    Returns:
+        Dict mapping username to a feature dict shaped like empty_features().
+        Users with no rows in the window are absent.
+    """
+    if events.empty:
+        return {}
+
+    scanned_at = pd.to_datetime(events["scanned_at"], utc=True)
+    now_ts = pd.Timestamp(now)
+    age = (now_ts - scanned_at).to_numpy()
+
+    in_window = age < np.timedelta64(WINDOW_DAYS, "D")
+    codes, usernames = pd.factorize(events["username"].to_numpy()[in_window])
+    if len(usernames) == 0:
+        return {}
+    scanned_at = scanned_at[in_window]
+    age = age[in_window]
+    n_users = len(usernames)
+
+    this_week = age < np.timedelta64(7, "D")
+    this_week_totals = np.bincount(codes[this_week], minlength=n_users)
+    last_week_totals = np.bincount(codes[~this_week], minlength=n_users)
+
+    # Hour-of-week heatmap for this week, one row per user
+    hour_of_week = (
+        scanned_at.dt.dayofweek.to_numpy() * 24 + scanned_at.dt.hour.to_numpy()
+    )
+    heatmap = np.bincount(
+        codes[this_week] * HOURS_PER_WEEK + hour_of_week[this_week],
+        minlength=n_users * HOURS_PER_WEEK,
+    ).reshape(n_users, HOURS_PER_WEEK)
+    by_day_hour = heatmap.reshape(n_users, 7, 24)
+    busiest_day = by_day_hour.sum(axis=2).argmax(axis=1)
+    busiest_hour = by_day_hour.sum(axis=1).argmax(axis=1)
+
+    # Busiest rolling window, wrapping from Sunday night into Monday morning
+    wrapped = np.concatenate([heatmap, heatmap[:, : PEAK_WINDOW_HOURS - 1]], axis=1)
+    cumulative = np.pad(wrapped.cumsum(axis=1), ((0, 0), (1, 0)))
+    window_sums = cumulative[:, PEAK_WINDOW_HOURS:] - cumulative[:, :-PEAK_WINDOW_HOURS]
+    peak_start = window_sums.argmax(axis=1)
+    peak_scans = window_sums[np.arange(n_users), peak_start]
+
+    # Daily presence, column 0 is today (UTC), column k is k days ago
+    n_days = WINDOW_DAYS + 1
+    today = now_ts.tz_convert("UTC").normalize()
+    days_ago = ((today - scanned_at.dt.normalize()) // pd.Timedelta(days=1)).to_numpy()
+    days_ago = np.clip(days_ago, 0, n_days - 1)
+    active = (
+        np.bincount(codes * n_days + days_ago, minlength=n_users * n_days)
+        .reshape(n_users, n_days)
+        > 0
+    )
+
+    # Run length of active days ending at each column, reset on inactive days
+    running = active.cumsum(axis=1)
+    resets = np.maximum.accumulate(np.where(active, 0, running), axis=1)
+    longest_streak = (running - resets).max(axis=1)
+
+    # A streak is still alive if the user was active today or yesterday
+    reversed_runs = np.cumprod(active[:, 1:], axis=1).sum(axis=1)
+    current_streak = np.where(active[:, 0], 1 + reversed_runs, reversed_runs)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.round(
+            (this_week_totals - last_week_totals) / last_week_totals * 100, 1
+        )
+
+    features = {}
+    for i, username in enumerate(usernames):
+        scans = int(this_week_totals[i])
+        features[username] = {
+            "total_scans_this_week": scans,
+            "total_scans_last_week": int(last_week_totals[i]),
+            "week_over_week_change": (
+                float(change[i]) if last_week_totals[i] else None
+            ),
+            "busiest_day": DAY_NAMES[busiest_day[i]] if scans else "",
+            "busiest_hour": int(busiest_hour[i]) if scans else 0,
+            "hour_of_week": heatmap[i].tolist(),
+            "current_streak_days": int(current_streak[i]),
+            "longest_streak_days": int(longest_streak[i]),
+            "peak_window": (
+                {
+                    "day": DAY_NAMES[peak_start[i] // 24],
+                    "start_hour": int(peak_start[i] % 24),
+                    "scans": int(peak_scans[i]),
+                }
+                if scans
+                else None
+            ),
+        }
+    return features
+
+
+def window_start(now: datetime) -> datetime:
+    """Return the earliest scanned_at that compute_user_features looks at."""
+    return now - timedelta(days=WINDOW_DAYS)
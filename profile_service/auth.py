@@ -51,3 +51,19 @@ def get_current_username(token: str) -> str:
     if username is None:
         raise HTTPException(status_code=401, detail="username not found in token")
     return username
+
+
+def get_current_identity(token: str) -> tuple[int, str]:
+    """Return (user_id, username) from a JWT token, decoding it only once.
+
+    Combines get_current_user_id and get_current_username for handlers that
+    need both claims. Raises 401 if either claim is missing.
+    """
+    payload = verify_token(token)
+    sub = payload.get("sub")
+    if sub is None:
+        raise HTTPException(status_code=401, detail="user_id not found in token")
+    username = payload.get("username")
+    if not username:
+        raise HTTPException(status_code=401, detail="username not found in token")
+    return int(sub), username
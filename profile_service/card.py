@@ -0,0 +1,92 @@
+"""
+Server-rendered public card page for the MeetMii profile service.
+
+GET /card/{username} returns everything a scanner without the app needs in
+one small HTML document: the public profile fields and the card's own QR
+code as inline SVG, so there is no second request to qr_service and no
+image to download. render takes the masked dict from _public_fields, so
+professional mode hides the same links as the JSON endpoint.
+
+Rendering costs a few milliseconds for the QR, so main.py caches the
+result in response_cache.cards.
+"""
+
+import html
+import qrcode
+import qrcode.image.svg
+
+CARD_URL = "https://meetmii.com/{username}"
+
+# Label and URL template for each link field, in display order
+_LINKS = (
+    ("linkedin", "LinkedIn", "https://www.linkedin.com/in/{}"),
+    ("email", "Email", "mailto:{}"),
+    ("website", "Website", "https://{}"),
+    ("instagram", "Instagram", "https://instagram.com/{}"),
+    ("twitter", "X", "https://x.com/{}"),
+    ("tiktok", "TikTok", "https://www.tiktok.com/@{}"),
+    ("snapchat", "Snapchat", "https://www.snapchat.com/add/{}"),
+)
+
+_PAGE = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} on MeetMii</title>
+<style>
+body{{font-family:system-ui,sans-serif;margin:0;background:#f4f4f7;color:#1c1c1e}}
+main{{max-width:420px;margin:2rem auto;padding:1.5rem;background:#fff;border-radius:16px;text-align:center}}
+h1{{margin:.25rem 0;font-size:1.5rem}}
+.handle{{color:#6e6e73;margin:0}}
+.bio{{margin:1rem 0}}
+ul{{list-style:none;padding:0;margin:1rem 0}}
+li a{{display:block;padding:.6rem;margin:.4rem 0;border-radius:10px;background:#f4f4f7;color:inherit;text-decoration:none}}
+.qr svg{{width:180px;height:180px}}
+</style>
+</head>
+<body>
+<main>
+<h1>{title}</h1>
+<p class="handle">@{username}</p>
+{bio}<ul>
+{links}</ul>
+<div class="qr">{qr}</div>
+</main>
+</body>
+</html>
+"""
+
+
+def _href(value: str, template: str) -> str:
+    if value.startswith(("http://", "https://", "mailto:")):
+        return value
+    return template.format(value.lstrip("@"))
+
+
+def qr_svg(username: str) -> str:
+    """Return the card's QR code as an inline <svg> element."""
+    image = qrcode.make(
+        CARD_URL.format(username=username), image_factory=qrcode.image.svg.SvgPathImage, box_size=10, border=4
+    )
+    return image.to_string(encoding="unicode")
+
+
+def render(fields: dict) -> bytes:
+    """Render the card page for a dict of public profile fields."""
+    username = fields["username"]
+    links = "".join(
+        f'<li><a href="{html.escape(_href(fields[name], template))}" rel="noopener">'
+        f"{label}: {html.escape(fields[name])}</a></li>\n"
+        for name, label, template in _LINKS
+        if fields.get(name)
+    )
+    bio = f'<p class="bio">{html.escape(fields["bio"])}</p>\n' if fields.get("bio") else ""
+    page = _PAGE.format(
+        title=html.escape(fields.get("display_name") or username),
+        username=html.escape(username),
+        bio=bio,
+        links=links,
+        qr=qr_svg(username),
+    )
+    return page.encode("utf-8")
@@ -2,32 +2,136 @@
 Database setup for MeetMii profile service.
 
 - engine: SQLAlchemy engine created from DATABASE_URL env var.
-          This is the low-level connection to PostgreSQL.
+          This is the low-level connection to PostgreSQL, used for schema
+          creation and the health check.
 
 - SessionLocal: A session factory. Each request gets its own session
                 created from this factory.
 
+- async_engine: asyncpg-backed engine for request handlers, created from
+                ASYNC_DATABASE_URL (defaults to DATABASE_URL with the
+                postgresql+asyncpg driver). Waiting on Postgres no longer
+                holds a threadpool slot.
+
+- AsyncSessionLocal: Factory for AsyncSession objects bound to async_engine.
+
 - Base: Declarative base class that all ORM models will inherit from.
 
 - get_db: FastAPI dependency that yields a database session per request
           and ensures the session is closed when the request is done.
+
+- get_async_db: Async equivalent of get_db yielding an AsyncSession bound to
+                the primary. Used by handlers that write.
+
+- get_read_db: Yields an AsyncSession for read-only handlers, bound to a
+               read replica from DATABASE_REPLICA_URLS when one is healthy
+               and to the primary otherwise. Requests carrying a valid
+               read-your-writes pin for the username they read always go
+               to the primary, so an owner sees their own edit.
+
+- pin_reads: Called after a profile is saved. Sets a short-lived pin for
+             the username, signed with JWT_SECRET_KEY, as the meetmii_rw
+             cookie and the X-Read-Your-Writes response header. The client
+             sends it back (browsers do so automatically; other clients
+             echo the header), so the pin holds on every instance for
+             READ_YOUR_WRITES_SECONDS. Clients that drop it may read a
+             replica's older copy until replication catches up.
+
+Both engines share the pool settings DB_POOL_SIZE, DB_MAX_OVERFLOW,
+DB_POOL_RECYCLE (seconds, -1 disables) and DB_POOL_PRE_PING.
+
+AUTO_CREATE_SCHEMA (default true) makes main.py run create_all at import.
+Set it to false in production and run migrate.py at deploy time instead, so
+a cold start does not wait on DDL round trips.
 """
 
+import hashlib
+import hmac
 import os
+import time
+import itertools
 from dotenv import load_dotenv
+from fastapi import Request, Response
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 load_dotenv()
 
+
+def async_url(url: str) -> str:
+    """Return url with the asyncpg driver, whichever Postgres scheme or driver it names.
+
+    Handles postgres://, postgresql:// and postgresql+psycopg2:// alike.
+    """
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url(DATABASE_URL)
+
+AUTO_CREATE_SCHEMA = os.getenv("AUTO_CREATE_SCHEMA", "true").lower() == "true"
+
+# Connection pool sizing, shared by the sync and async engines
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+}
 
 # Low-level connection pool to PostgreSQL
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
 
 # Factory for creating individual database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Non-blocking connection pool used by the request handlers
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **POOL_OPTIONS)
+
+# Factory for async sessions; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Comma-separated replica URLs; empty means every read goes to the primary
+DATABASE_REPLICA_URLS = [
+    async_url(url.strip())
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+
+# How long reads of a just-saved username stay on the primary
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+READ_YOUR_WRITES_COOKIE = "meetmii_rw"
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+# How long a replica that failed to connect is skipped before being retried
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+
+class Replica:
+    """An async engine for one read replica plus its health state."""
+
+    def __init__(self, url: str):
+        self.engine = create_async_engine(url, **POOL_OPTIONS)
+        self.sessionmaker = async_sessionmaker(
+            bind=self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        self.down_until = 0.0
+
+    def mark_down(self) -> None:
+        self.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+
+    def in_use(self) -> int:
+        return self.engine.sync_engine.pool.checkedout()
+
+
+replicas = [Replica(url) for url in DATABASE_REPLICA_URLS]
+_rotation = itertools.count()
+
 # Base class for ORM models to inherit from
 Base = declarative_base()
 
@@ -39,3 +143,88 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Yield an async database session and close it when the request is done."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _sign(payload: str) -> str:
+    key = os.getenv("JWT_SECRET_KEY", "").encode()
+    return hmac.new(key, payload.encode(), hashlib.sha256).hexdigest()
+
+
+def pin_reads(response: Response, username: str) -> None:
+    """Send the client a pin keeping its reads of username on the primary.
+
+    The pin is "{expiry}.{username}.{signature}", with expiry in Unix
+    seconds. It is not set when there are no replicas to avoid.
+    """
+    if not replicas or READ_YOUR_WRITES_SECONDS <= 0:
+        return
+    payload = f"{int(time.time()) + READ_YOUR_WRITES_SECONDS}.{username}"
+    pin = f"{payload}.{_sign(payload)}"
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE, pin, max_age=READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax"
+    )
+    response.headers[READ_YOUR_WRITES_HEADER] = pin
+
+
+def _is_pinned(request: Request, username: str = None) -> bool:
+    """Whether request carries an unexpired, correctly signed pin for username."""
+    pin = request.headers.get(READ_YOUR_WRITES_HEADER) or request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    if not username or not pin:
+        return False
+    try:
+        payload, signature = pin.rsplit(".", 1)
+        expires, pinned_username = payload.split(".", 1)
+        expires = int(expires)
+    except ValueError:
+        return False
+    return (
+        pinned_username == username
+        and expires > time.time()
+        and hmac.compare_digest(signature, _sign(payload))
+    )
+
+
+def _pick_replica():
+    """Return the least busy healthy replica, or None to use the primary.
+
+    Ties are broken round-robin so idle replicas share the load evenly.
+    """
+    now = time.monotonic()
+    healthy = [replica for replica in replicas if replica.down_until <= now]
+    if not healthy:
+        return None
+    start = next(_rotation) % len(healthy)
+    return min(healthy[start:] + healthy[:start], key=Replica.in_use)
+
+
+def _is_connection_error(error: Exception) -> bool:
+    if isinstance(error, (OSError, TimeoutError, OperationalError, InterfaceError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+async def get_read_db(request: Request):
+    """Yield a session for a read-only request, preferring a healthy replica.
+
+    A replica whose connection fails is skipped for REPLICA_RETRY_SECONDS;
+    the failing request still errors, later ones go elsewhere.
+    """
+    replica = None if _is_pinned(request, request.path_params.get("username")) else _pick_replica()
+    if replica is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    async with replica.sessionmaker() as db:
+        try:
+            yield db
+        except Exception as e:
+            if _is_connection_error(e):
+                replica.mark_down()
+            raise
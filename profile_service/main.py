@@ -1,17 +1,78 @@
-from datetime import datetime, timezone
-from fastapi import FastAPI, Depends, HTTPException
+import hashlib
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+import orjson
+from fastapi import FastAPI, BackgroundTasks, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from database import engine, Base, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+import database
+from database import engine, Base, get_async_db, get_read_db
 import models
 import schemas
 import auth
+import card
+import health
+import metrics
 import pubsub_publisher
+import rate_limit
+import response_cache
+import search
 
-Base.metadata.create_all(bind=engine)
+metrics.instrument_engine(database.engine, "postgres-sync")
+metrics.instrument_engine(database.async_engine, "postgres")
+for number, replica in enumerate(database.replicas, start=1):
+    metrics.instrument_engine(replica.engine, f"postgres-replica-{number}")
 
-app = FastAPI()
+if database.AUTO_CREATE_SCHEMA:
+    Base.metadata.create_all(bind=engine)
+
+# Browsers may reuse a card page for this long without asking again
+CARD_MAX_AGE_SECONDS = int(os.getenv("CARD_MAX_AGE_SECONDS", "3600"))
+
+
+def _replica_check() -> dict:
+    # Always ok: reads fall back to the primary when every replica is down
+    now = time.monotonic()
+    healthy = sum(replica.down_until <= now for replica in database.replicas)
+    return {"ok": True, "healthy": healthy, "total": len(database.replicas)}
+
+
+prober = health.Prober(
+    background={"postgres": health.database_check(engine)},
+    instant={
+        "postgres_pool": health.pool_check(
+            database.async_engine, database.POOL_OPTIONS["pool_size"], database.POOL_OPTIONS["max_overflow"]
+        ),
+        "replicas": _replica_check,
+    },
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prober.start()
+    yield
+    prober.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+public_limiter = rate_limit.from_env("RATE_LIMIT_PROFILE_PER_IP", 120)
+app.add_middleware(
+    rate_limit.RateLimitMiddleware,
+    rules=[
+        rate_limit.Rule(("GET",), r"/profile/", public_limiter),
+        rate_limit.Rule(("GET",), r"/card/", public_limiter),
+        rate_limit.Rule(("POST",), r"/profile/bulk$", rate_limit.from_env("RATE_LIMIT_BULK_PER_IP", 30)),
+    ],
+)
+# Added last so it is outermost and also times rate-limited requests
+app.add_middleware(metrics.MetricsMiddleware)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="http://localhost:8001/users/login")
 
@@ -21,11 +82,23 @@ def root():
     return {"message": "MeetMii profile service is running"}
 
 
+@app.get("/livez")
+async def livez():
+    return prober.livez()
+
+
+# Probes are answered on the event loop from the cached report, so they
+# never wait for a threadpool slot or open a database connection
+@app.get("/readyz")
 @app.get("/health")
-def health():
-    with engine.connect() as conn:
-        conn.execute(text("SELECT 1"))
-    return {"status": "healthy", "database": "connected"}
+async def readyz():
+    status_code, body = prober.readyz()
+    return JSONResponse(body, status_code=status_code)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return metrics.metrics_response()
 
 
 @app.get("/profile/table-check")
@@ -34,62 +107,215 @@ def table_check():
 
 
 @app.post("/profile", response_model=schemas.ProfileResponse)
-def upsert_profile(
+async def upsert_profile(
     body: schemas.ProfileRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user_id = auth.get_current_user_id(token)
-    payload = auth.verify_token(token)
-    username = payload.get("username")
-    if not username:
-        raise HTTPException(status_code=401, detail="username not found in token")
-
-    profile = db.query(models.Profile).filter(models.Profile.user_id == user_id).first()
-
-    if profile:
-        for field, value in body.model_dump(exclude_unset=True).items():
-            setattr(profile, field, value)
-        profile.updated_at = datetime.now(timezone.utc)
-    else:
-        profile = models.Profile(
-            user_id=user_id,
-            username=username,
-            **body.model_dump(exclude_unset=True),
-        )
-        db.add(profile)
+    """Create or partially update the caller's profile in one round trip.
+
+    Runs a single INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING.
+    Only fields present in the request body are written on update, matching
+    model_dump(exclude_unset=True); updated_at is always bumped. When the
+    row was inserted, a profile-created event is published after the
+    response so qr_service pre-renders the new card's QR codes. The
+    response pins the caller's next reads of the profile to the primary
+    (see database.pin_reads).
+    """
+    user_id, username = auth.get_current_identity(token)
+    fields = body.model_dump(exclude_unset=True)
+    now = models.utcnow()
 
-    db.commit()
-    db.refresh(profile)
+    stmt = (
+        pg_insert(models.Profile)
+        .values(user_id=user_id, username=username, created_at=now, updated_at=now, **fields)
+        .on_conflict_do_update(
+            index_elements=[models.Profile.user_id],
+            set_={**fields, "updated_at": now},
+        )
+        .returning(models.Profile)
+    )
+    result = await db.execute(
+        select(models.Profile).from_statement(stmt).execution_options(populate_existing=True)
+    )
+    profile = result.scalar_one()
+    await db.commit()
+    database.pin_reads(response, username)
+    # The update branch never sets created_at, so it only equals now on insert
+    if profile.created_at == now:
+        background_tasks.add_task(pubsub_publisher.publish_profile_created, username)
     return profile
 
 
+@app.get("/profile/search", response_model=schemas.ProfileSearchResponse)
+async def search_profiles(
+    q: str = Query(min_length=search.MIN_QUERY_LENGTH, max_length=64),
+    limit: int = Query(default=20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Find profiles by username or display name prefix, or fuzzy match.
+
+    Pass the returned next_cursor back as cursor to fetch the next page.
+    Searches are not counted as scans. q must have at least
+    search.MIN_QUERY_LENGTH characters besides surrounding whitespace.
+    """
+    q = q.strip()
+    if len(q) < search.MIN_QUERY_LENGTH:
+        raise HTTPException(
+            status_code=422, detail=f"q must be at least {search.MIN_QUERY_LENGTH} characters"
+        )
+    rows = (await db.execute(search.search_statement(q, limit, cursor))).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last_profile, last_score = page[-1]
+        next_cursor = search.encode_cursor(last_score, last_profile.id)
+
+    return schemas.ProfileSearchResponse(
+        results=[
+            schemas.ProfileSearchResult(username=profile.username, display_name=profile.display_name)
+            for profile, _ in page
+        ],
+        next_cursor=next_cursor,
+    )
+
+
 @app.get("/profile/{username}", response_model=schemas.ProfileResponse)
-def get_profile(username: str, source: str = None, db: Session = Depends(get_db)):
-    profile = db.query(models.Profile).filter(models.Profile.username == username).first()
+async def get_profile(
+    username: str,
+    background_tasks: BackgroundTasks,
+    source: str = None,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Return a public profile, served from pre-serialised JSON bytes.
+
+    The response carries an ETag derived from updated_at and the display
+    mode. A matching If-None-Match gets a bare 304; otherwise the JSON is
+    taken from response_cache, or built with orjson and cached on a miss.
+    Either way the view still counts as a scan unless source=app.
+    """
+    result = await db.execute(select(models.Profile).where(models.Profile.username == username))
+    profile = result.scalar_one_or_none()
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    # Publishing blocks on the Pub/Sub ack, so run it after the response is sent
+    if source != "app":
+        background_tasks.add_task(pubsub_publisher.publish_scan_event, username)
+
+    version = (profile.updated_at, profile.is_professional_mode)
+    etag = _profile_etag(profile)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in _split_etags(if_none_match)):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.profiles.get(username, version)
+    if body is None:
+        body = response_cache.profiles.put(username, version, orjson.dumps(_public_fields(profile)))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/card/{username}", response_class=Response)
+async def get_card(
+    username: str,
+    background_tasks: BackgroundTasks,
+    source: str = None,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Return the public card page: profile fields and QR code in one HTML page.
+
+    Counts as a scan unless source=app, like GET /profile/{username}. The
+    page is rendered once per profile version and then served from
+    response_cache.cards. It is sent with an ETag and a private max-age of
+    CARD_MAX_AGE_SECONDS: the scanner's browser can reuse it, but shared
+    caches cannot, so every new scanner still reaches the service and is
+    counted.
+    """
+    result = await db.execute(select(models.Profile).where(models.Profile.username == username))
+    profile = result.scalar_one_or_none()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
 
     if source != "app":
-        pubsub_publisher.publish_scan_event(username)
+        background_tasks.add_task(pubsub_publisher.publish_scan_event, username)
+
+    version = (profile.updated_at, profile.is_professional_mode)
+    etag = _profile_etag(profile, ":card")
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={CARD_MAX_AGE_SECONDS}"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in _split_etags(if_none_match)):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.cards.get(username, version)
+    if body is None:
+        # Drawing the QR is CPU work, keep it off the event loop
+        page = await run_in_threadpool(card.render, _public_fields(profile))
+        body = response_cache.cards.put(username, version, page)
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
+
+
+@app.post("/profile/bulk", response_model=schemas.BulkProfileResponse)
+async def get_profiles_bulk(
+    body: schemas.BulkProfileRequest,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Return the public profiles for a list of usernames in one query.
 
+    Meant for rendering saved contact lists, so lookups are never counted as
+    scans. Applies the same professional-mode masking as GET
+    /profile/{username}. Duplicate usernames are collapsed; unknown ones are
+    listed under missing.
+    """
+    usernames = list(dict.fromkeys(body.usernames))
+    result = await db.execute(select(models.Profile).where(models.Profile.username.in_(usernames)))
+    found = {profile.username: profile for profile in result.scalars()}
+
+    return schemas.BulkProfileResponse(
+        profiles=[_public_profile(found[username]) for username in usernames if username in found],
+        missing=[username for username in usernames if username not in found],
+    )
+
+
+def _public_profile(profile: models.Profile) -> schemas.ProfileResponse:
+    """Build the response a public viewer sees for a profile."""
+    return schemas.ProfileResponse(**_public_fields(profile))
+
+
+# Links hidden from public viewers while a profile is in professional mode
+_PERSONAL_LINKS = ("instagram", "snapchat", "twitter", "tiktok")
+
+
+def _public_fields(profile: models.Profile) -> dict:
+    """Return the ProfileResponse fields a public viewer sees, as a plain dict.
+
+    In professional mode only LinkedIn, email and website are shown; the
+    personal social links are blanked out. Keys follow ProfileResponse field
+    order so the dict can be serialised directly without Pydantic.
+    """
+    fields = {name: getattr(profile, name) for name in schemas.ProfileResponse.model_fields}
     if profile.is_professional_mode:
-        return schemas.ProfileResponse(
-            id=profile.id,
-            user_id=profile.user_id,
-            username=profile.username,
-            display_name=profile.display_name,
-            bio=profile.bio,
-            instagram=None,
-            snapchat=None,
-            linkedin=profile.linkedin,
-            twitter=None,
-            tiktok=None,
-            email=profile.email,
-            website=profile.website,
-            is_professional_mode=profile.is_professional_mode,
-            created_at=profile.created_at,
-            updated_at=profile.updated_at,
-        )
+        for name in _PERSONAL_LINKS:
+            fields[name] = None
+    return fields
+
+
+def _profile_etag(profile: models.Profile, representation: str = "") -> str:
+    """Return a strong ETag that changes whenever the public JSON would.
+
+    Pass a representation suffix such as ":card" for other renderings of the
+    same profile so their tags never collide with the JSON one.
+    """
+    digest = hashlib.blake2b(
+        f"{profile.username}:{profile.updated_at.isoformat()}:{profile.is_professional_mode}{representation}".encode(),
+        digest_size=8,
+    )
+    return f'"{digest.hexdigest()}"'
+
 
-    return schemas.ProfileResponse.model_validate(profile)
+def _split_etags(header: str) -> list[str]:
+    """Split an If-None-Match header into entity tags, ignoring weak prefixes."""
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
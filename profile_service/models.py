@@ -4,13 +4,27 @@ ORM model representing a user profile in the MeetMii platform.
 Each Profile row stores the public-facing information for a user,
 linked to the users table in user_service via user_id. One user
 has exactly one profile.
+
+username and display_name also carry pg_trgm GIN indexes for
+GET /profile/search. They are created with the tables, and added to an
+existing profiles table by the same create_all call on startup (or in
+migrate.py when AUTO_CREATE_SCHEMA=false).
 """
 
 from datetime import datetime, timezone
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import DDL, Boolean, Column, DateTime, Index, Integer, String, event
 from database import Base
 
 
+def utcnow() -> datetime:
+    """Return the current UTC time as a naive datetime.
+
+    The timestamp columns are WITHOUT TIME ZONE, which asyncpg refuses to
+    bind aware datetimes to, so values are stored as naive UTC.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Profile(Base):
     __tablename__ = "profiles"
 
@@ -27,5 +41,34 @@ class Profile(Base):
     email = Column(String, nullable=True)
     website = Column(String, nullable=True)
     is_professional_mode = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow)
+
+
+# Trigram indexes serving ILIKE prefix matches and similarity (%) search
+Index(
+    "ix_profiles_username_trgm",
+    Profile.username,
+    postgresql_using="gin",
+    postgresql_ops={"username": "gin_trgm_ops"},
+)
+Index(
+    "ix_profiles_display_name_trgm",
+    Profile.display_name,
+    postgresql_using="gin",
+    postgresql_ops={"display_name": "gin_trgm_ops"},
+)
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_missing_indexes(target, connection, **kw):
+    """Add indexes that create_all skips because the table already existed."""
+    if connection.dialect.name == "postgresql":
+        for index in Profile.__table__.indexes:
+            index.create(connection, checkfirst=True)
@@ -2,44 +2,95 @@
 Pub/Sub publisher for the MeetMii profile service.
 
 Publishes a scan event message to the qr-scanned topic every time a public
-profile is viewed. Failures are logged but never propagate to the caller
-so the profile is always returned to the user.
+profile is viewed, and a profile-created event to PUBSUB_PROFILE_TOPIC_NAME
+when a profile is first saved so qr_service can pre-render its QR codes.
+Failures are logged but never propagate to the caller so the profile is
+always returned to the user.
+
+Scan events carry a unique event_id and, when SPOOL_DIR is set, are
+appended to spool.scans before publishing, so analytics_service/replay.py
+can restore scans that never reached scan_events.
 """
 
 import os
 import json
 import logging
+import threading
+import uuid
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-from google.cloud import pubsub_v1
+import metrics
+import spool
 
 load_dotenv()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 TOPIC_NAME = os.getenv("PUBSUB_TOPIC_NAME")
+PROFILE_TOPIC_NAME = os.getenv("PUBSUB_PROFILE_TOPIC_NAME", "profile-created")
+
+topic_path = f"projects/{PROJECT_ID}/topics/{TOPIC_NAME}"
+profile_topic_path = f"projects/{PROJECT_ID}/topics/{PROFILE_TOPIC_NAME}"
 
-publisher = pubsub_v1.PublisherClient()
-topic_path = publisher.topic_path(PROJECT_ID, TOPIC_NAME)
+_publisher = None
+_publisher_lock = threading.Lock()
 
 logger = logging.getLogger(__name__)
 
 
-def publish_scan_event(username: str) -> None:
-    """Publish a scan event message to the qr-scanned Pub/Sub topic.
+def get_publisher():
+    """Return the shared PublisherClient, creating it on first publish.
 
-    Builds a JSON message containing the username and the current UTC
-    timestamp, then publishes it asynchronously. Any exception from
-    Pub/Sub is caught and logged so the profile response is never blocked
-    or delayed by a publish failure.
+    google.cloud.pubsub_v1 is imported here too, so neither the import nor
+    the gRPC channel is paid for during a cold start.
     """
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                from google.cloud import pubsub_v1
+
+                _publisher = pubsub_v1.PublisherClient()
+    return _publisher
+
+
+def _publish(path: str, message: dict, event: str) -> None:
+    """Publish message as JSON to path and wait for the ack, logging failures."""
+    username = message["username"]
     try:
-        message = {
-            "username": username,
-            "scanned_at": datetime.now(timezone.utc).isoformat(),
-        }
         data = json.dumps(message).encode("utf-8")
-        future = publisher.publish(topic_path, data)
-        future.result()
-        logger.info("Published scan event for username=%s", username)
+        with metrics.timed("pubsub", "publish"):
+            future = get_publisher().publish(path, data)
+            future.result()
+        logger.info("Published %s event for username=%s", event, username)
     except Exception as e:
-        logger.error("Failed to publish scan event for username=%s: %s", username, e)
+        logger.error("Failed to publish %s event for username=%s: %s", event, username, e)
+
+
+def publish_scan_event(username: str) -> None:
+    """Publish a scan event message to the qr-scanned Pub/Sub topic.
+
+    Builds a JSON message containing a new event_id, the username and the
+    current UTC timestamp, spools it, then publishes it asynchronously. Any
+    exception from the spool or Pub/Sub is caught and logged so the profile
+    response is never blocked or delayed by a publish failure.
+    """
+    message = {
+        "event_id": uuid.uuid4().hex,
+        "username": username,
+        "scanned_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if spool.scans is not None:
+        try:
+            spool.scans.append(message)
+        except Exception as e:
+            logger.error("Failed to spool scan event for username=%s: %s", username, e)
+    _publish(topic_path, message, "scan")
+
+
+def publish_profile_created(username: str) -> None:
+    """Publish a profile-created event so qr_service can warm its QR cache."""
+    _publish(
+        profile_topic_path,
+        {"username": username, "created_at": datetime.now(timezone.utc).isoformat()},
+        "profile-created",
+    )
@@ -0,0 +1,56 @@
+"""
+In-process cache of pre-serialised public profile responses.
+
+Public profile scans vastly outnumber edits, so the final response bytes
+are kept per username and reused until the profile changes. Each entry is
+stored with a version (updated_at and anything else that changes the
+output, such as is_professional_mode); a lookup with a different version is
+a miss and the next put replaces the entry, so each key holds at most one
+rendering. Entries are evicted least-recently-used beyond
+PROFILE_CACHE_SIZE keys.
+
+Rendered card pages (GET /card/{username}) are kept the same way in cards,
+capped at CARD_CACHE_SIZE keys as each page carries a few KB of QR SVG.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+CARD_CACHE_SIZE = int(os.getenv("CARD_CACHE_SIZE", "2000"))
+
+
+class ResponseCache:
+    """Thread-safe LRU map of key -> (version, body bytes)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[bytes]:
+        """Return the cached body for key if it was stored for this version."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, version: Hashable, body: bytes) -> bytes:
+        """Store body for key at version, replacing any older rendering."""
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+
+profiles = ResponseCache(PROFILE_CACHE_SIZE)
+cards = ResponseCache(CARD_CACHE_SIZE)
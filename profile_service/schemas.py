@@ -8,11 +8,22 @@ Pydantic schemas for the MeetMii profile service.
 - ProfileResponse: Shapes the profile data returned to the client.
                    Uses from_attributes=True so SQLAlchemy model instances
                    can be serialized directly.
+
+- BulkProfileRequest: Validates the request body for POST /profile/bulk.
+                      Accepts up to MAX_BULK_USERNAMES usernames.
+
+- BulkProfileResponse: The public profiles found, in request order, plus
+                       the usernames that have no profile.
+
+- ProfileSearchResponse: One page of GET /profile/search results and the
+                         cursor for the next page, if any.
 """
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+MAX_BULK_USERNAMES = 500
 
 
 class ProfileRequest(BaseModel):
@@ -51,3 +62,30 @@ class ProfileResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BulkProfileRequest(BaseModel):
+    """Input schema for looking up several public profiles at once."""
+
+    usernames: list[str] = Field(min_length=1, max_length=MAX_BULK_USERNAMES)
+
+
+class BulkProfileResponse(BaseModel):
+    """Output schema for a bulk profile lookup."""
+
+    profiles: list[ProfileResponse]
+    missing: list[str]
+
+
+class ProfileSearchResult(BaseModel):
+    """A single search hit; only the fields needed to render a result list."""
+
+    username: str
+    display_name: Optional[str]
+
+
+class ProfileSearchResponse(BaseModel):
+    """Output schema for a page of profile search results."""
+
+    results: list[ProfileSearchResult]
+    next_cursor: Optional[str]
@@ -0,0 +1,79 @@
+"""
+Username and display name search for the MeetMii profile service.
+
+Builds the query behind GET /profile/search. Matches are either a
+case-insensitive prefix of username or display_name, or trigram-similar to
+the query (pg_trgm's % operator), all served by the GIN trigram indexes on
+Profile. Results are ranked by score, where a username prefix match adds
+1.0 on top of the best trigram similarity.
+
+Pages are chained with a keyset cursor on (score, id) rather than OFFSET, so
+paging is stable and never skips or repeats rows. score is computed per row
+and no index covers it: every page still scores and sorts all matches
+before the cursor filter applies, so a page costs about as much as the
+first one, which grows with the number of matches.
+
+Queries need at least MIN_QUERY_LENGTH characters. A trigram index cannot
+serve a shorter pattern, and Postgres would fall back to a sequential scan
+of profiles.
+"""
+
+import base64
+import json
+from fastapi import HTTPException
+from sqlalchemy import Double, and_, case, cast, func, or_, select
+import models
+
+MIN_QUERY_LENGTH = 3
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def encode_cursor(score: float, profile_id: int) -> str:
+    """Encode the last row of a page as an opaque cursor string."""
+    return base64.urlsafe_b64encode(json.dumps([score, profile_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    """Decode a cursor from encode_cursor. Raises 400 if it is malformed."""
+    try:
+        score, profile_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(profile_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def search_statement(q: str, limit: int, cursor: str = None):
+    """Return a SELECT of (Profile, score) rows matching q, best first.
+
+    Fetches limit + 1 rows so the caller can tell whether another page
+    follows.
+    """
+    prefix = _escape_like(q) + "%"
+    username = models.Profile.username
+    display_name = models.Profile.display_name
+
+    similarity = func.greatest(
+        func.similarity(username, q), func.coalesce(func.similarity(display_name, q), 0)
+    )
+    score = (
+        cast(case((username.ilike(prefix, escape="\\"), 1.0), else_=0.0), Double)
+        + cast(similarity, Double)
+    ).label("score")
+
+    stmt = select(models.Profile, score).where(
+        or_(
+            username.ilike(prefix, escape="\\"),
+            display_name.ilike(prefix, escape="\\"),
+            username.op("%")(q),
+            display_name.op("%")(q),
+        )
+    )
+    if cursor:
+        after_score, after_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            or_(score < after_score, and_(score == after_score, models.Profile.id > after_id))
+        )
+    return stmt.order_by(score.desc(), models.Profile.id).limit(limit + 1)
@@ -0,0 +1,89 @@
+"""
+Durable local spool of published events for the MeetMii profile service.
+
+Every scan event is appended to a spool segment before it is handed to
+Pub/Sub, so scans survive a Pub/Sub outage, a subscriber that is down past
+the retention window, or one that dropped messages. analytics_service's
+replay.py reads the segments back into scan_events; every event carries an
+event_id, so replaying events that were already ingested is harmless.
+
+- Spool: appends JSON lines to SPOOL_DIR/{name}-{start}-{host}-{id}.jsonl,
+         where id is random per segment. Containers often run the service
+         under the same PID, so the host name and id, not the PID, keep
+         every instance and process on its own files with no locking
+         between them. A segment is closed after SPOOL_SEGMENT_SECONDS and
+         never written again; closed segments older than
+         SPOOL_RETENTION_HOURS are deleted when the next one is opened.
+         Lines are flushed to the OS on every append (they survive a crash
+         of the process, not of the machine).
+
+- scans: the Spool for scan events, or None when SPOOL_DIR is unset.
+
+On Cloud Run, point SPOOL_DIR at a mounted NFS volume (Filestore); the
+container's own filesystem is lost with the instance. Avoid Cloud Storage
+FUSE mounts: objects cannot be appended to, so every flush re-uploads the
+whole segment. On other hosts a local disk is best.
+"""
+
+import glob
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SPOOL_DIR = os.getenv("SPOOL_DIR", "")
+SPOOL_SEGMENT_SECONDS = int(os.getenv("SPOOL_SEGMENT_SECONDS", "3600"))
+SPOOL_RETENTION_HOURS = float(os.getenv("SPOOL_RETENTION_HOURS", "72"))
+
+
+class Spool:
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+        self._file = None
+        self._closes_at = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None or time.monotonic() >= self._closes_at:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        segment = f"{self.name}-{started}-{socket.gethostname()}-{uuid.uuid4().hex[:12]}.jsonl"
+        path = os.path.join(self.directory, segment)
+        self._file = open(path, "a", encoding="utf-8")
+        self._closes_at = time.monotonic() + SPOOL_SEGMENT_SECONDS
+        self._prune(path)
+
+    def _prune(self, current: str) -> None:
+        cutoff = time.time() - SPOOL_RETENTION_HOURS * 3600
+        for path in glob.glob(os.path.join(self.directory, f"{self.name}-*.jsonl")):
+            try:
+                if path != current and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                # Another process pruned it first
+                pass
+
+
+scans = Spool(SPOOL_DIR, "scans") if SPOOL_DIR else None
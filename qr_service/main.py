@@ -1,40 +1,63 @@
-from io import BytesIO
-import qrcode
-from fastapi import FastAPI
-from fastapi.responses import Response
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query
+from fastapi.responses import FileResponse, Response
+import metrics
+import pubsub_subscriber
+import qr_cache
+import rate_limit
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
+# A username's QR code never changes, so clients may keep it for a day
+CACHE_HEADERS = {"Cache-Control": "public, max-age=86400"}
 
-@app.get("/")
-def root():
-    return {"message": "MeetMii QR service is running"}
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-rendering needs somewhere to put the images
+    if pubsub_subscriber.SUBSCRIPTION_NAME:
+        if qr_cache.QR_CACHE_DIR:
+            pubsub_subscriber.start_subscriber()
+        else:
+            logger.warning("PUBSUB_PROFILE_SUBSCRIPTION_NAME is set but QR_CACHE_DIR is not; not pre-rendering")
+    yield
 
-@app.get("/qr/{username}")
-def generate_qr(username: str):
-    """Generate a QR code PNG for the given username.
 
-    Encodes the public profile URL https://meetmii.com/{username} into a
-    QR code and returns it as a PNG image. The image is generated in memory
-    and never written to disk.
-    """
-    url = f"https://meetmii.com/{username}"
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    rate_limit.RateLimitMiddleware,
+    rules=[rate_limit.Rule(("GET",), r"/qr/", rate_limit.from_env("RATE_LIMIT_QR_PER_IP", 60))],
+)
+# Added last so it is outermost and also times rate-limited requests
+app.add_middleware(metrics.MetricsMiddleware)
+
 
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
+@app.get("/")
+def root():
+    return {"message": "MeetMii QR service is running"}
 
-    img = qr.make_image(fill_color="black", back_color="white")
 
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    image_bytes = buffer.read()
+@app.get("/metrics")
+def prometheus_metrics():
+    return metrics.metrics_response()
 
-    return Response(content=image_bytes, media_type="image/png")
+
+@app.get("/qr/{username}")
+def generate_qr(
+    username: str,
+    fmt: str = Query(default="png", alias="format", pattern="^(png|svg)$"),
+    size: int = Query(default=10, ge=1, le=40),
+):
+    """Return the QR code for https://meetmii.com/{username}.
+
+    format is png (default) or svg; size is the box size, in pixels per
+    module for PNG. Images pre-rendered into QR_CACHE_DIR are sent straight
+    from the file. Misses are rendered in memory and not written back, so
+    requests for made-up usernames cannot fill the shared cache.
+    """
+    path = qr_cache.get(username, fmt, size)
+    if path is not None:
+        return FileResponse(path, media_type=qr_cache.FORMATS[fmt], headers=CACHE_HEADERS)
+    image = qr_cache.render(username, fmt, size)
+    return Response(content=image, media_type=qr_cache.FORMATS[fmt], headers=CACHE_HEADERS)
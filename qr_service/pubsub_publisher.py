@@ -9,21 +9,40 @@ so the QR image is always returned to the user.
 import os
 import json
 import logging
+import threading
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-from google.cloud import pubsub_v1
+import metrics
 
 load_dotenv()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 TOPIC_NAME = os.getenv("PUBSUB_TOPIC_NAME")
 
-publisher = pubsub_v1.PublisherClient()
-topic_path = publisher.topic_path(PROJECT_ID, TOPIC_NAME)
+topic_path = f"projects/{PROJECT_ID}/topics/{TOPIC_NAME}"
+
+_publisher = None
+_publisher_lock = threading.Lock()
 
 logger = logging.getLogger(__name__)
 
 
+def get_publisher():
+    """Return the shared PublisherClient, creating it on first publish.
+
+    google.cloud.pubsub_v1 is imported here too, so neither the import nor
+    the gRPC channel is paid for during a cold start.
+    """
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                from google.cloud import pubsub_v1
+
+                _publisher = pubsub_v1.PublisherClient()
+    return _publisher
+
+
 def publish_scan_event(username: str) -> None:
     """Publish a scan event message to the qr-scanned Pub/Sub topic.
 
@@ -38,8 +57,9 @@ def publish_scan_event(username: str) -> None:
             "scanned_at": datetime.now(timezone.utc).isoformat(),
         }
         data = json.dumps(message).encode("utf-8")
-        future = publisher.publish(topic_path, data)
-        future.result()
+        with metrics.timed("pubsub", "publish"):
+            future = get_publisher().publish(topic_path, data)
+            future.result()
         logger.info("Published scan event for username=%s", username)
     except Exception as e:
         logger.error("Failed to publish scan event for username=%s: %s", username, e)
@@ -0,0 +1,72 @@
+"""
+Pub/Sub subscriber for the MeetMii QR service.
+
+Listens to PUBSUB_PROFILE_SUBSCRIPTION_NAME, a subscription on the topic
+profile_service publishes to when a profile is created, and pre-renders the
+new card's QR codes into the shared cache (see qr_cache.prerender). The
+first scan of a new card is then served from a file instead of paying for
+the render, which matters most when a whole room scans one card at once.
+
+Runs in a background thread so the subscriber never blocks the FastAPI
+event loop. A message whose rendering fails is nacked and redelivered.
+"""
+
+import os
+import json
+import logging
+import threading
+from dotenv import load_dotenv
+import metrics
+import qr_cache
+
+load_dotenv()
+
+PROJECT_ID = os.getenv("GCP_PROJECT_ID")
+SUBSCRIPTION_NAME = os.getenv("PUBSUB_PROFILE_SUBSCRIPTION_NAME")
+
+logger = logging.getLogger(__name__)
+
+
+@metrics.timed("pubsub", "process_message")
+def process_message(message) -> None:
+    """Pre-render the QR codes for the username in a profile-created event."""
+    try:
+        username = json.loads(message.data.decode("utf-8"))["username"]
+    except Exception as e:
+        # Retrying cannot fix a malformed message
+        logger.error("Dropping malformed profile-created message: %s", e)
+        message.ack()
+        return
+    try:
+        written = qr_cache.prerender(username)
+    except Exception as e:
+        logger.error("Failed to pre-render QR codes for username=%s: %s", username, e)
+        message.nack()
+        return
+    message.ack()
+    logger.info("Pre-rendered %d QR images for username=%s", written, username)
+
+
+def start_subscriber() -> None:
+    """Start a streaming Pub/Sub pull subscription in a background thread.
+
+    google.cloud.pubsub_v1 is imported here rather than at module load, so it
+    stays off the import path when pre-rendering is not configured.
+    """
+    from google.cloud import pubsub_v1
+
+    subscriber = pubsub_v1.SubscriberClient()
+    subscription_path = subscriber.subscription_path(PROJECT_ID, SUBSCRIPTION_NAME)
+
+    streaming_pull_future = subscriber.subscribe(subscription_path, callback=process_message)
+    logger.info("Listening for profile-created messages on %s", subscription_path)
+
+    def run():
+        try:
+            streaming_pull_future.result()
+        except Exception as e:
+            logger.error("Pub/Sub subscriber stopped unexpectedly: %s", e)
+            streaming_pull_future.cancel()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
@@ -0,0 +1,107 @@
+"""
+QR code rendering and the shared on-disk image cache for MeetMii.
+
+- render: draws the QR code for https://meetmii.com/{username} as PNG or
+          SVG bytes at a given box size (pixels per module for PNG).
+
+- path_for / get / put: images are cached as files under QR_CACHE_DIR,
+                        keyed by username, format and size. A QR code only
+                        depends on the username, so cached files never go
+                        stale. put writes to a temporary file and renames
+                        it into place, so readers never see a partial image
+                        and concurrent writers of the same image are safe.
+
+- prerender: renders every format in FORMATS at every size in
+             QR_PRERENDER_SIZES into the cache, skipping images already
+             there. Called by pubsub_subscriber when a profile is created.
+
+Point QR_CACHE_DIR at storage every instance mounts (on Cloud Run, a Cloud
+Storage bucket volume) to share one cache across instances. Leave it unset
+to disable caching; every request then renders in memory as before.
+"""
+
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+import qrcode
+import qrcode.image.svg
+from dotenv import load_dotenv
+import metrics
+
+load_dotenv()
+
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", "")
+QR_PRERENDER_SIZES = [int(size) for size in os.getenv("QR_PRERENDER_SIZES", "10,20").split(",") if size.strip()]
+
+PROFILE_URL = "https://meetmii.com/{username}"
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def render(username: str, fmt: str = "png", size: int = 10) -> bytes:
+    """Return the QR code image for username as fmt bytes."""
+    with metrics.timed("qrcode", f"render_{fmt}"):
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=size,
+            border=4,
+        )
+        qr.add_data(PROFILE_URL.format(username=username))
+        qr.make(fit=True)
+
+        if fmt == "svg":
+            return qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).to_string()
+
+        img = qr.make_image(fill_color="black", back_color="white")
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def path_for(username: str, fmt: str, size: int) -> str:
+    # Hashed so any username is a safe file name; the prefix directory
+    # keeps each directory small
+    digest = hashlib.blake2b(username.encode(), digest_size=16).hexdigest()
+    return os.path.join(QR_CACHE_DIR, digest[:2], f"{digest}-{size}.{fmt}")
+
+
+def get(username: str, fmt: str, size: int):
+    """Return the cached file path for an image, or None on a miss."""
+    if not QR_CACHE_DIR:
+        return None
+    path = path_for(username, fmt, size)
+    return path if os.path.exists(path) else None
+
+
+def put(username: str, fmt: str, size: int, image: bytes) -> None:
+    """Atomically write image to the cache. No-op when caching is disabled."""
+    if not QR_CACHE_DIR:
+        return
+    path = path_for(username, fmt, size)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        # mkstemp creates the file owner-only
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(image)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def prerender(username: str) -> int:
+    """Render and cache every common variant of username's QR code.
+
+    Returns how many images were written.
+    """
+    written = 0
+    for fmt in FORMATS:
+        for size in QR_PRERENDER_SIZES:
+            if get(username, fmt, size) is None:
+                put(username, fmt, size, render(username, fmt, size))
+                written += 1
+    return written
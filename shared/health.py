@@ -0,0 +1,136 @@
+"""
+Cached liveness and readiness probes for MeetMii services.
+
+- Prober: keeps the latest health report so /livez and /readyz answer from
+          memory. Checks that do I/O (SELECT 1, a BigQuery call) run on a
+          daemon thread every HEALTH_CHECK_INTERVAL_SECONDS; checks that only
+          read in-process counters (pool saturation, subscriber lag) run on
+          every probe so they are never stale.
+
+- database_check: SELECT 1 through a sync engine.
+
+- ping_check: wraps a function that raises when its dependency is down,
+              such as a store's ping.
+
+- pool_check: how full a connection pool is. Not ok once checked-out
+              connections reach POOL_SATURATION_LIMIT of pool_size +
+              max_overflow, so the instance is taken out of rotation before
+              requests start queueing for a connection.
+
+A check is a callable returning a dict with at least an "ok" key. A check
+that raises is reported as not ok with the error.
+
+/readyz is 503 until the first background round has finished, while any
+check is not ok, and when the last round is older than three intervals
+(a dependency call is hanging). /livez only says the event loop is serving.
+"""
+
+import os
+import threading
+import time
+
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "10"))
+POOL_SATURATION_LIMIT = float(os.getenv("POOL_SATURATION_LIMIT", "0.9"))
+
+
+def _run(check) -> dict:
+    start = time.perf_counter()
+    try:
+        result = dict(check())
+    except Exception as e:
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+class Prober:
+    def __init__(self, background: dict, instant: dict = None, interval: float = HEALTH_CHECK_INTERVAL_SECONDS):
+        self.background = background
+        self.instant = instant or {}
+        self.interval = interval
+        self.started_at = time.monotonic()
+        self._results = None
+        self._checked_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Run the background checks now and then every interval."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="health-prober", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def check_now(self) -> None:
+        """Run the background checks once on the calling thread."""
+        results = {name: _run(check) for name, check in self.background.items()}
+        self._results, self._checked_at = results, time.monotonic()
+
+    def _loop(self) -> None:
+        while True:
+            self.check_now()
+            if self._stop.wait(self.interval):
+                return
+
+    def livez(self) -> dict:
+        return {"status": "alive", "uptime_seconds": round(time.monotonic() - self.started_at, 1)}
+
+    def readyz(self) -> tuple[int, dict]:
+        """Return the status code and body for /readyz."""
+        checks = dict(self._results or {})
+        checks.update((name, _run(check)) for name, check in self.instant.items())
+        age = None if self._checked_at is None else time.monotonic() - self._checked_at
+        ready = age is not None and age <= 3 * self.interval and all(c["ok"] for c in checks.values())
+        body = {
+            "status": "ready" if ready else "unavailable",
+            "checked_seconds_ago": None if age is None else round(age, 1),
+            "checks": checks,
+        }
+        return (200 if ready else 503), body
+
+
+def database_check(engine):
+    from sqlalchemy import text
+
+    def check() -> dict:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    return check
+
+
+def ping_check(ping):
+    def check() -> dict:
+        ping()
+        return {"ok": True}
+
+    return check
+
+
+def pool_check(engine, pool_size: int, max_overflow: int):
+    """Report how much of engine's pool is checked out.
+
+    Accepts a sync Engine or an AsyncEngine. With unlimited overflow
+    (max_overflow -1) the pool cannot saturate and only usage is reported.
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    capacity = pool_size + max_overflow if max_overflow >= 0 else 0
+
+    def check() -> dict:
+        if not hasattr(pool, "checkedout"):
+            return {"ok": True}
+        in_use = pool.checkedout()
+        if capacity <= 0:
+            return {"ok": True, "in_use": in_use}
+        saturation = in_use / capacity
+        return {
+            "ok": saturation < POOL_SATURATION_LIMIT,
+            "in_use": in_use,
+            "capacity": capacity,
+            "saturation": round(saturation, 3),
+        }
+
+    return check
@@ -0,0 +1,133 @@
+"""
+Prometheus metrics for the MeetMii services.
+
+- MetricsMiddleware: ASGI middleware recording every request in
+                     http_request_duration_seconds, labelled by method,
+                     route template (/profile/{username}, not the raw path,
+                     so label cardinality stays bounded) and status code.
+
+- timed: histogram timer for calls to a dependency (Postgres, BigQuery,
+         Pub/Sub, Gemini, ...), recorded in dependency_duration_seconds by
+         dependency and operation. Works as a context manager or decorator.
+
+- instrument_engine: times every statement an SQLAlchemy engine runs, with
+                     the engine's name as the dependency and the SQL verb
+                     as the operation, and exports its pool occupancy as
+                     db_pool_connections.
+
+- metrics_response: the /metrics endpoint body in Prometheus text format.
+
+Recording is a perf_counter pair and a histogram observe, and pool gauges
+are read only when /metrics is scraped, so this stays on in production.
+"""
+
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from fastapi.responses import Response
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+
+DEPENDENCY_SECONDS = Histogram(
+    "dependency_duration_seconds",
+    "Latency of calls to databases and external services.",
+    ["dependency", "operation"],
+)
+
+
+def timed(dependency: str, operation: str):
+    """Return a timer recording into dependency_duration_seconds."""
+    return DEPENDENCY_SECONDS.labels(dependency, operation).time()
+
+
+def observe(dependency: str, operation: str, seconds: float) -> None:
+    DEPENDENCY_SECONDS.labels(dependency, operation).observe(seconds)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.labels(scope["method"], route, status).observe(time.perf_counter() - start)
+
+
+class _PoolCollector:
+    """Reads pool occupancy of the registered engines at scrape time."""
+
+    def __init__(self):
+        self.engines = {}
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            "db_pool_connections", "Connections in the SQLAlchemy pool by state.", labels=["engine", "state"]
+        )
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            if not hasattr(pool, "checkedout"):
+                continue
+            gauge.add_metric([name, "size"], pool.size())
+            gauge.add_metric([name, "checked_out"], pool.checkedout())
+            gauge.add_metric([name, "checked_in"], pool.checkedin())
+            # overflow() counts up from -size as connections are opened
+            gauge.add_metric([name, "overflow"], max(0, pool.overflow()))
+        yield gauge
+
+
+_pools = _PoolCollector()
+REGISTRY.register(_pools)
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Time engine's statements and export its pool gauges under name.
+
+    Accepts a sync Engine or an AsyncEngine.
+    """
+    from sqlalchemy import event
+
+    engine = getattr(engine, "sync_engine", engine)
+    _pools.engines[name] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+        observe(name, verb, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,154 @@
+"""
+In-memory token-bucket rate limiting for the MeetMii services.
+
+Each TokenBucketLimiter holds one bucket per key (a client IP, an account
+email, ...). A bucket holds up to burst tokens and refills at
+rate_per_minute; a request takes one token or is rejected with 429 and a
+Retry-After telling the client when the next token will be available.
+
+- Constant time: buckets refill lazily on access, so there is no background
+  timer and a check is a dict lookup plus a little arithmetic.
+
+- Bounded memory: keys are spread over SHARDS OrderedDicts, each ordered by
+  last access and guarded by its own lock. Every check evicts buckets from
+  the cold end of its shard that have sat idle long enough to be full again
+  (forgetting them changes nothing) and, past RATE_LIMIT_MAX_KEYS in total,
+  the least recently used ones.
+
+RateLimitMiddleware applies limiters by client IP to matching method/path
+rules before the request reaches the app, so rejected requests never touch
+the database or the password hasher. Handlers that need to limit by
+something in the request body call enforce directly before doing any work.
+
+- RATE_LIMIT_TRUSTED_PROXIES: proxies in front of the service that append
+                              to X-Forwarded-For (1 on Cloud Run). 0 uses
+                              the socket peer address.
+
+- RATE_LIMIT_MAX_KEYS: buckets kept per limiter (default 100000).
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+load_dotenv()
+
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+SHARDS = 16
+
+
+class TokenBucketLimiter:
+    """Sharded map of key -> (tokens, last access time)."""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate_per_minute / 60.0
+        self.burst = float(burst or rate_per_minute)
+        # After this long untouched a bucket is full again, same as a new one
+        self.idle_seconds = self.burst / self.rate
+        self.max_keys_per_shard = max(1, max_keys // SHARDS)
+        self.rejected = 0
+        self._shards = [OrderedDict() for _ in range(SHARDS)]
+        self._locks = [threading.Lock() for _ in range(SHARDS)]
+
+    def acquire(self, key: Hashable) -> float:
+        """Take one token for key.
+
+        Returns 0 if the request is allowed, otherwise the number of seconds
+        until a token will be available.
+        """
+        shard = hash(key) % SHARDS
+        buckets = self._shards[shard]
+        now = time.monotonic()
+        with self._locks[shard]:
+            bucket = buckets.pop(key, None)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+            while buckets:
+                oldest = next(iter(buckets.values()))
+                if now - oldest[1] < self.idle_seconds and len(buckets) < self.max_keys_per_shard:
+                    break
+                buckets.popitem(last=False)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+                self.rejected += 1
+            buckets[key] = (tokens, now)
+        return wait
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets in self._shards)
+
+
+def from_env(name: str, default_per_minute: float) -> Optional[TokenBucketLimiter]:
+    """Build a limiter from a requests-per-minute env var. 0 disables it."""
+    rate = float(os.getenv(name, str(default_per_minute)))
+    return TokenBucketLimiter(rate) if rate > 0 else None
+
+
+def _retry_after(wait: float) -> dict:
+    return {"Retry-After": str(math.ceil(wait))}
+
+
+def enforce(limiter: Optional[TokenBucketLimiter], key: Hashable) -> None:
+    """Raise 429 if key has no tokens left in limiter."""
+    if limiter is None:
+        return
+    wait = limiter.acquire(key)
+    if wait:
+        raise HTTPException(status_code=429, detail="Too many requests", headers=_retry_after(wait))
+
+
+def client_ip(scope) -> str:
+    """Return the client address, skipping RATE_LIMIT_TRUSTED_PROXIES hops."""
+    if RATE_LIMIT_TRUSTED_PROXIES:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",")]
+                return hops[max(0, len(hops) - RATE_LIMIT_TRUSTED_PROXIES)]
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+class Rule(NamedTuple):
+    """Limit requests whose method is in methods and path matches path."""
+
+    methods: tuple
+    path: str
+    limiter: Optional[TokenBucketLimiter]
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-IP limits to the requests matching rules."""
+
+    def __init__(self, app, rules: list[Rule]):
+        self.app = app
+        self.rules = [
+            (rule.methods, re.compile(rule.path), rule.limiter) for rule in rules if rule.limiter is not None
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for methods, path, limiter in self.rules:
+                if scope["method"] in methods and path.match(scope["path"]):
+                    wait = limiter.acquire(client_ip(scope))
+                    if wait:
+                        response = JSONResponse(
+                            {"detail": "Too many requests"}, status_code=429, headers=_retry_after(wait)
+                        )
+                        await response(scope, receive, send)
+                        return
+        await self.app(scope, receive, send)
@@ -0,0 +1,107 @@
+"""
+In-process stand-in for the qr-scanned Pub/Sub topic and subscription.
+
+- FakePublisher: drop-in for pubsub_v1.PublisherClient.publish. Every
+                 publish is queued on the bus and returns an already
+                 resolved future, like a healthy Pub/Sub with no latency.
+
+- FakeMessage: what the subscriber callback receives. Carries data,
+               message_id and publish_time like a real message; nack puts it
+               back on the queue for redelivery.
+
+- Bus: the topic plus its subscription. start runs the callback on a pool
+       of threads (10, the streaming pull default) and every ack records the
+       lag from the scan's scanned_at to the ack, i.e. until the row is
+       written.
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+
+class FakeMessage:
+    def __init__(self, bus: "Bus", data: bytes, message_id: str):
+        self.bus = bus
+        self.data = data
+        self.message_id = message_id
+        self.attributes = {}
+        self.publish_time = datetime.now(timezone.utc)
+        self.delivery_attempt = 0
+
+    def ack(self) -> None:
+        self.bus._acked(self)
+
+    def nack(self) -> None:
+        self.bus._nacked(self)
+
+
+class FakePublisher:
+    def __init__(self, bus: "Bus"):
+        self.bus = bus
+
+    def publish(self, topic: str, data: bytes, **attributes) -> Future:
+        future = Future()
+        future.set_result(self.bus.publish(data))
+        return future
+
+
+class Bus:
+    def __init__(self):
+        self.published = 0
+        self.acked = 0
+        self.nacked = 0
+        self.lags = []
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, data: bytes) -> str:
+        message = FakeMessage(self, data, str(next(self._ids)))
+        with self._lock:
+            self.published += 1
+        self._queue.put(message)
+        return message.message_id
+
+    def _acked(self, message: FakeMessage) -> None:
+        scanned_at = datetime.fromisoformat(json.loads(message.data)["scanned_at"])
+        lag = time.time() - scanned_at.timestamp()
+        with self._lock:
+            self.acked += 1
+            self.lags.append(lag)
+        self._queue.task_done()
+
+    def _nacked(self, message: FakeMessage) -> None:
+        with self._lock:
+            self.nacked += 1
+        self._queue.put(message)
+        self._queue.task_done()
+
+    def start(self, callback, threads: int = 10) -> None:
+        """Deliver queued messages to callback from a pool of daemon threads."""
+
+        def worker():
+            while True:
+                message = self._queue.get()
+                message.delivery_attempt += 1
+                try:
+                    callback(message)
+                except Exception:
+                    # The real client nacks when the callback raises
+                    message.nack()
+
+        for _ in range(threads):
+            threading.Thread(target=worker, daemon=True).start()
+
+    def drain(self, timeout: float) -> bool:
+        """Wait until every published message is acked. False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
@@ -0,0 +1,38 @@
+"""
+Loads several MeetMii services into one Python process.
+
+Every service imports its siblings by bare name (import main, import
+database, ...), so two services cannot normally share an interpreter. load
+puts one service directory at the front of sys.path, imports its main, then
+takes that service's modules back out of sys.modules. The loaded code keeps
+its own references, so the next service can be loaded under the same names.
+
+The helpers in shared/ (metrics, rate_limit, health) are on sys.path for
+every service and loaded once, as they register process-wide Prometheus
+collectors.
+"""
+
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SHARED_DIR = os.path.join(ROOT, "shared")
+sys.path.append(SHARED_DIR)
+
+
+def load(service: str) -> dict:
+    """Import service's main.py and return its own modules by name."""
+    directory = os.path.join(ROOT, service)
+    own = {name[:-3] for name in os.listdir(directory) if name.endswith(".py")}
+    for name in own:
+        sys.modules.pop(name, None)
+
+    sys.path.insert(0, directory)
+    try:
+        importlib.import_module("main")
+        return {name: sys.modules[name] for name in own if name in sys.modules}
+    finally:
+        sys.path.remove(directory)
+        for name in own:
+            sys.modules.pop(name, None)
@@ -0,0 +1,114 @@
+"""
+Cold-start report for the MeetMii services.
+
+For each service, imports main.py in a fresh interpreter under
+`python -X importtime`, then runs the app's lifespan startup, and reports:
+
+- import: wall time to import main, including module-level work such as
+          create_all or building cloud clients.
+- startup: wall time of the FastAPI lifespan startup.
+- the slowest modules by self time (their own import and module-level init,
+  excluding what they import) and by cumulative time.
+- the service's own modules with their self and cumulative times.
+
+The services are imported with the current environment, so set
+DATABASE_URL, ANALYTICS_STORE=local, AUTO_CREATE_SCHEMA=false etc. the
+same way the deployment does.
+
+Usage:
+    python tools/startup_report.py
+    python tools/startup_report.py user_service profile_service --top 10
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = ["user_service", "profile_service", "qr_service", "analytics_service", "insights_service"]
+SHARED_DIR = os.path.join(ROOT, "shared")
+
+_PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def _startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+started = asyncio.run(_startup())
+sys.stdout.write(json.dumps({"import_s": imported - start, "startup_s": started - imported}))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure(service: str) -> dict:
+    """Import service's main.py in a subprocess and return its timings."""
+    directory = os.path.join(ROOT, service)
+    # The images copy shared/ next to each service; locally it goes on the path
+    path = os.pathsep.join(filter(None, [SHARED_DIR, os.environ.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=directory,
+        env={**os.environ, "PYTHONPATH": path},
+        capture_output=True,
+        text=True,
+    )
+    modules = []
+    other = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+        elif not line.startswith("import time:"):
+            other.append(line)
+    if result.returncode != 0:
+        return {"error": "\n".join(other[-10:])}
+
+    own = {name[:-3] for name in os.listdir(directory) + os.listdir(SHARED_DIR) if name.endswith(".py")}
+    return {**json.loads(result.stdout), "modules": modules, "own": own}
+
+
+def report(service: str, timings: dict, top: int) -> None:
+    print(f"\n== {service}")
+    if "error" in timings:
+        print(f"  failed to start:\n{timings['error']}")
+        return
+
+    print(f"  import main: {timings['import_s'] * 1000:8.1f} ms")
+    print(f"  startup:     {timings['startup_s'] * 1000:8.1f} ms")
+    modules = timings["modules"]
+
+    def table(title: str, rows) -> None:
+        print(f"  {title}")
+        print(f"    {'module':<48} {'self ms':>9} {'cumul ms':>9}")
+        for name, self_ms, cumulative_ms in rows:
+            print(f"    {name:<48} {self_ms:>9.1f} {cumulative_ms:>9.1f}")
+
+    table(f"top {top} by self time", sorted(modules, key=lambda m: m[1], reverse=True)[:top])
+    table(
+        f"top {top} by cumulative time",
+        sorted(modules, key=lambda m: m[2], reverse=True)[:top],
+    )
+    table("service modules", [m for m in modules if m[0] in timings["own"]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("services", nargs="*", default=SERVICES)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    for service in args.services:
+        report(service, measure(service), args.top)
+
+
+if __name__ == "__main__":
+    main()
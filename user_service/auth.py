@@ -2,15 +2,45 @@
 Password hashing and JWT utilities for the MeetMii user service.
 
 Uses passlib with bcrypt for password hashing and python-jose for JWT encoding.
+The bcrypt cost factor is BCRYPT_ROUNDS (default 12); hashes made with any
+other cost are reported as needing an update by verify_and_update.
+
+The hashing functions are CPU-bound and blocking. Request handlers should
+call them through the hashing module, which runs them in a process pool.
+
+JWT settings are read from the environment once at import. Verified tokens
+and the users they name are cached in auth_cache, so an authenticated call
+only reaches Postgres on a miss. With USERS_ME_FROM_CLAIMS=true,
+GET /users/me is answered from the signed claims alone, which may be up to
+JWT_EXPIRE_MINUTES stale.
 """
 
 import os
+import hashlib
+import secrets
+import time
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from fastapi import HTTPException
 from passlib.context import CryptContext
+import auth_cache
+
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "30"))
+USERS_ME_FROM_CLAIMS = os.getenv("USERS_ME_FROM_CLAIMS", "false").lower() == "true"
+# A refresh token revoked this recently is a lost rotation race, not a replay
+REFRESH_REUSE_GRACE_SECONDS = float(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "10"))
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 
 def hash_password(password: str) -> str:
@@ -23,41 +53,105 @@ def verify_password(plain: str, hashed: str) -> bool:
     return _pwd_context.verify(plain, hashed)
 
 
+def verify_and_update(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify plain against hashed and rehash it if the cost factor changed.
+
+    Returns (matched, new_hash). new_hash is None unless the password
+    matched and hashed was made with a cost other than BCRYPT_ROUNDS, in
+    which case the caller should store it in place of the old hash.
+    """
+    return _pwd_context.verify_and_update(plain, hashed)
+
+
 def create_access_token(data: dict) -> str:
     """Encode data as a signed JWT token with an expiration time.
 
-    Reads JWT_SECRET_KEY, JWT_ALGORITHM, and JWT_EXPIRE_MINUTES from
-    environment variables. The token expires after JWT_EXPIRE_MINUTES minutes.
+    The token expires after JWT_EXPIRE_MINUTES minutes.
     Returns the encoded JWT string.
     """
-    secret_key = os.getenv("JWT_SECRET_KEY")
-    algorithm = os.getenv("JWT_ALGORITHM", "HS256")
-    expire_minutes = int(os.getenv("JWT_EXPIRE_MINUTES", "30"))
-
     payload = data.copy()
-    payload["exp"] = datetime.now(timezone.utc) + timedelta(minutes=expire_minutes)
-    return jwt.encode(payload, secret_key, algorithm=algorithm)
+    payload["exp"] = datetime.now(timezone.utc) + timedelta(minutes=JWT_EXPIRE_MINUTES)
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
-def get_current_user(token: str, db):
-    """Decode a JWT token and return the corresponding User from the database.
+def decode_access_token(token: str) -> dict:
+    """Verify a JWT and return its payload, caching the result until exp.
 
-    Reads JWT_SECRET_KEY and JWT_ALGORITHM from environment variables.
-    Raises 401 if the token is invalid, expired, or the user does not exist.
+    Raises 401 if the token is invalid, expired, or has no subject.
     """
-    secret_key = os.getenv("JWT_SECRET_KEY")
-    algorithm = os.getenv("JWT_ALGORITHM", "HS256")
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = auth_cache.tokens.get(digest)
+    if payload is not None:
+        return payload
 
     try:
-        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
-        email: str = payload.get("email")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    auth_cache.tokens.put(digest, payload, payload.get("exp", 0))
+    return payload
+
+
+def user_from_claims(token: str):
+    """Return the user fields carried in a verified token's claims.
+
+    Returns None for tokens issued before the created_at claim was added,
+    in which case the caller should fall back to get_current_user.
+    """
+    payload = decode_access_token(token)
+    if "created_at" not in payload:
+        return None
+    return {
+        "id": int(payload["sub"]),
+        "email": payload["email"],
+        "username": payload["username"],
+        "created_at": payload["created_at"],
+    }
+
+
+def hash_refresh_token(token: str) -> bytes:
+    """Return the SHA-256 digest under which a refresh token is stored."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def create_refresh_token() -> tuple[str, bytes, datetime]:
+    """Generate a new opaque refresh token.
+
+    Reads REFRESH_TOKEN_EXPIRE_DAYS from the environment (default 30).
+    Returns (token, digest, expires_at): the token goes to the client, the
+    digest and naive-UTC expiry go in the refresh_tokens table.
+    """
+    expire_days = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+    token = secrets.token_urlsafe(32)
+    expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=expire_days)
+    return token, hash_refresh_token(token), expires_at
+
+
+async def get_current_user(token: str, db):
+    """Decode a JWT token and return the corresponding User.
+
+    The user is looked up by the token's sub (the primary key) and served
+    from auth_cache.users when possible. db is an AsyncSession, so a miss
+    never blocks the event loop. The returned User may be detached from db,
+    so treat it as read-only.
+    Raises 401 if the token is invalid, expired, or the user does not exist.
+    """
+    payload = decode_access_token(token)
+    try:
+        user_id = int(payload["sub"])
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user = auth_cache.users.get(user_id)
+    if user is not None:
+        return user
 
     from models import User
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    auth_cache.users.put(user_id, user, time.time() + auth_cache.USER_CACHE_TTL_SECONDS)
     return user
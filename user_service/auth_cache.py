@@ -0,0 +1,70 @@
+"""
+In-process caches behind auth.get_current_user.
+
+Every authenticated request used to verify the JWT signature and load the
+user by email from Postgres. Both results are stable for a while, so they
+are kept here and the database is only hit on a miss.
+
+- tokens: verified JWT payloads keyed by the SHA-256 digest of the token,
+          kept until the token's own exp. Holding the digest rather than
+          the token keeps bearer credentials out of memory dumps.
+          Size is TOKEN_CACHE_SIZE.
+
+- users: User rows keyed by id, kept for USER_CACHE_TTL_SECONDS so a
+         changed email or username is picked up within that window.
+         Size is USER_CACHE_SIZE.
+
+Both are evicted least-recently-used beyond their size. Lookups are
+counted in auth_cache_lookups_total by cache and result (hit or miss) on
+/metrics.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from prometheus_client import Counter
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+LOOKUPS = Counter("auth_cache_lookups", "Auth cache lookups by cache and result.", ["cache", "result"])
+
+
+class TTLCache:
+    """LRU map of key -> value where every entry has its own expiry time.
+
+    Only touched from the event loop thread, so no lock is needed.
+    """
+
+    def __init__(self, name: str, max_entries: int):
+        self.max_entries = max_entries
+        self._hits = LOOKUPS.labels(name, "hit")
+        self._misses = LOOKUPS.labels(name, "miss")
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value for key, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self._misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        self._hits.inc()
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """Store value for key until expires_at (a Unix timestamp)."""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+tokens = TTLCache("tokens", TOKEN_CACHE_SIZE)
+users = TTLCache("users", USER_CACHE_SIZE)
@@ -0,0 +1,106 @@
+"""
+Bulk user import for the MeetMii user service.
+
+Loads a CSV of users (header: email,username,password) into the users table
+far faster than calling POST /users/register per row:
+
+- Passwords are hashed with auth.hash_password across a process pool, one
+  worker per CPU unless --workers is given. This runs in its own process so
+  it never competes with the service's request-path hashing pool.
+
+- Each batch is streamed into a temporary staging table with COPY and moved
+  into users with one INSERT ... SELECT ... ON CONFLICT DO NOTHING, so rows
+  whose email or username already exists (or repeats earlier in the file)
+  are skipped instead of aborting the import.
+
+Each batch commits on its own. Re-running an interrupted import skips the
+rows that already made it in.
+
+Usage:
+    python bulk_import.py users.csv
+    python bulk_import.py users.csv --batch-size 10000 --workers 8
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from database import engine, Base
+import auth
+import models
+
+STAGING_TABLE = "users_import"
+
+
+def _batches(rows, size: int):
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_batch(cursor, batch: list[dict], hashes: list[str]) -> None:
+    """Stream one batch into the staging table with COPY."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row, hashed_password in zip(batch, hashes):
+        writer.writerow((row["email"], row["username"], hashed_password))
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {STAGING_TABLE} (email, username, hashed_password) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+def import_users(path: str, batch_size: int, workers: int) -> tuple[int, int]:
+    """Import every user in the CSV at path. Returns (inserted, skipped)."""
+    Base.metadata.create_all(bind=engine, tables=[models.User.__table__])
+    inserted = skipped = 0
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(
+            f"CREATE TEMP TABLE {STAGING_TABLE} "
+            "(email text NOT NULL, username text NOT NULL, hashed_password text NOT NULL)"
+        )
+        with open(path, newline="") as f, ProcessPoolExecutor(max_workers=workers) as pool:
+            for batch in _batches(csv.DictReader(f), batch_size):
+                chunksize = max(1, len(batch) // (workers * 4))
+                hashes = list(pool.map(auth.hash_password, (row["password"] for row in batch), chunksize=chunksize))
+
+                _copy_batch(cursor, batch, hashes)
+                cursor.execute(
+                    f"INSERT INTO users (email, username, hashed_password, created_at) "
+                    f"SELECT email, username, hashed_password, %s FROM {STAGING_TABLE} "
+                    "ON CONFLICT DO NOTHING",
+                    (models.utcnow(),),
+                )
+                inserted += cursor.rowcount
+                skipped += len(batch) - cursor.rowcount
+                cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+                connection.commit()
+                print(f"  {inserted + skipped:,} rows read, {inserted:,} inserted, {skipped:,} skipped")
+    finally:
+        connection.close()
+    return inserted, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV file with email,username,password columns")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    inserted, skipped = import_users(args.path, args.batch_size, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Imported {inserted:,} users ({skipped:,} skipped) in {elapsed:.1f}s, {(inserted + skipped) / elapsed:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
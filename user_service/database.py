@@ -2,32 +2,79 @@
 Database setup for MeetMii user service.
 
 - engine: SQLAlchemy engine created from DATABASE_URL env var.
-          This is the low-level connection to PostgreSQL.
+          This is the low-level connection to PostgreSQL, used for schema
+          creation and the health check.
 
 - SessionLocal: A session factory. Each request gets its own session
                 created from this factory.
 
+- async_engine: asyncpg-backed engine for request handlers, created from
+                ASYNC_DATABASE_URL (defaults to DATABASE_URL with the
+                postgresql+asyncpg driver). Waiting on Postgres no longer
+                holds a threadpool slot.
+
+- AsyncSessionLocal: Factory for AsyncSession objects bound to async_engine.
+
 - Base: Declarative base class that all ORM models will inherit from.
 
 - get_db: FastAPI dependency that yields a database session per request
           and ensures the session is closed when the request is done.
+
+- get_async_db: Async equivalent of get_db yielding an AsyncSession.
+
+Both engines share the pool settings DB_POOL_SIZE, DB_MAX_OVERFLOW,
+DB_POOL_RECYCLE (seconds, -1 disables) and DB_POOL_PRE_PING.
+
+AUTO_CREATE_SCHEMA (default true) makes main.py run create_all at import.
+Set it to false in production and run migrate.py at deploy time instead, so
+a cold start does not wait on DDL round trips.
 """
 
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 load_dotenv()
 
+
+def async_url(url: str) -> str:
+    """Return url with the asyncpg driver, whichever Postgres scheme or driver it names.
+
+    Handles postgres://, postgresql:// and postgresql+psycopg2:// alike.
+    """
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url(DATABASE_URL)
+
+AUTO_CREATE_SCHEMA = os.getenv("AUTO_CREATE_SCHEMA", "true").lower() == "true"
+
+# Connection pool sizing, shared by the sync and async engines
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+}
 
 # Low-level connection pool to PostgreSQL
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
 
 # Factory for creating individual database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Non-blocking connection pool used by the request handlers
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **POOL_OPTIONS)
+
+# Factory for async sessions; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base class for ORM models to inherit from
 Base = declarative_base()
 
@@ -39,3 +86,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Yield an async database session and close it when the request is done."""
+    async with AsyncSessionLocal() as db:
+        yield db
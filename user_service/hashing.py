@@ -0,0 +1,138 @@
+"""
+Password hashing executor for the MeetMii user service.
+
+bcrypt costs tens to hundreds of milliseconds of CPU per call. Running it
+on the event loop or the default threadpool starves every other request on
+the instance, and threads cannot use more than one core because of the GIL.
+This module runs auth.hash_password and auth.verify_and_update in a
+dedicated process pool instead.
+
+- HASH_WORKERS: worker processes (defaults to the CPU count).
+
+- HASH_MAX_PENDING: hashing jobs allowed in flight or queued. Beyond this
+                    the request is shed with 503 and Retry-After rather than
+                    queueing behind work it will time out waiting for.
+
+Latency (queue wait plus hashing) of the last LATENCY_SAMPLES calls and
+shed counts are kept for the /metrics/hashing endpoint. The same numbers are
+exported on /metrics: latency as dependency "bcrypt", plus the
+hash_pending gauge and hash_shed_total counter.
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from prometheus_client import Counter, Gauge
+import auth
+import metrics
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 4)))
+LATENCY_SAMPLES = 1024
+
+_executor = None
+
+# Only touched from the event loop thread, so no lock is needed
+_pending = 0
+_completed = 0
+_shed = 0
+_latencies = deque(maxlen=LATENCY_SAMPLES)
+
+HASH_PENDING = Gauge("hash_pending", "Hashing jobs running or queued in the process pool.")
+HASH_PENDING.set_function(lambda: _pending)
+HASH_SHED = Counter("hash_shed", "Hashing jobs rejected with 503 because the queue was full.")
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _executor
+
+
+async def _run(fn, *args):
+    """Run fn in the process pool, shedding load when the queue is full."""
+    global _pending, _shed
+    if _pending >= HASH_MAX_PENDING:
+        _shed += 1
+        HASH_SHED.inc()
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    job = _get_executor().submit(fn, *args)
+    _pending += 1
+    # Released when the pool job ends, not when the request stops waiting:
+    # a cancelled request (client gone, timeout) cannot stop a bcrypt call
+    # already running, and that call still occupies a worker.
+    job.add_done_callback(lambda _: _call_soon(loop, _job_done))
+    try:
+        return await asyncio.wrap_future(job)
+    finally:
+        elapsed = time.perf_counter() - start
+        _latencies.append(elapsed)
+        metrics.observe("bcrypt", fn.__name__, elapsed)
+
+
+def _job_done() -> None:
+    global _pending, _completed
+    _pending -= 1
+    _completed += 1
+
+
+def _call_soon(loop: asyncio.AbstractEventLoop, callback) -> None:
+    """Schedule callback on loop from a pool thread, unless the loop has closed."""
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password off the event loop. Raises 503 when overloaded."""
+    return await _run(auth.hash_password, password)
+
+
+async def verify_and_update(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify a password off the event loop, returning (matched, new_hash).
+
+    new_hash is set when the stored hash used an outdated cost factor and
+    should be replaced. Raises 503 when overloaded.
+    """
+    return await _run(auth.verify_and_update, plain, hashed)
+
+
+def stats() -> dict:
+    """Return pool settings, counters and recent latency percentiles in ms."""
+    ordered = sorted(_latencies)
+
+    def percentile(p: float):
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 2)
+
+    return {
+        "workers": HASH_WORKERS,
+        "max_pending": HASH_MAX_PENDING,
+        "pending": _pending,
+        "completed": _completed,
+        "shed": _shed,
+        "latency_ms_p50": percentile(0.50),
+        "latency_ms_p99": percentile(0.99),
+        "latency_ms_max": round(ordered[-1] * 1000, 2) if ordered else None,
+    }
+
+
+def shutdown() -> None:
+    """Stop the worker processes; called when the app shuts down."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
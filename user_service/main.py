@@ -1,15 +1,59 @@
+from contextlib import asynccontextmanager
+from datetime import timedelta
 from fastapi import FastAPI, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from database import engine, Base, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+import database
+from database import engine, Base, get_async_db
 import models
 import schemas
 import auth
-
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
+import hashing
+import health
+import metrics
+import rate_limit
+
+metrics.instrument_engine(database.engine, "postgres-sync")
+metrics.instrument_engine(database.async_engine, "postgres")
+
+if database.AUTO_CREATE_SCHEMA:
+    Base.metadata.create_all(bind=engine)
+
+
+prober = health.Prober(
+    background={"postgres": health.database_check(engine)},
+    instant={
+        "postgres_pool": health.pool_check(
+            database.async_engine, database.POOL_OPTIONS["pool_size"], database.POOL_OPTIONS["max_overflow"]
+        )
+    },
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prober.start()
+    yield
+    prober.stop()
+    hashing.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Checked before the handler runs, so rejected attempts never reach bcrypt
+login_account_limiter = rate_limit.from_env("RATE_LIMIT_LOGIN_PER_ACCOUNT", 10)
+app.add_middleware(
+    rate_limit.RateLimitMiddleware,
+    rules=[
+        rate_limit.Rule(("POST",), r"/users/login$", rate_limit.from_env("RATE_LIMIT_LOGIN_PER_IP", 30)),
+        rate_limit.Rule(("POST",), r"/users/register$", rate_limit.from_env("RATE_LIMIT_REGISTER_PER_IP", 10)),
+    ],
+)
+# Added last so it is outermost and also times rate-limited requests
+app.add_middleware(metrics.MetricsMiddleware)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
@@ -19,11 +63,28 @@ def root():
     return {"message": "MeetMii user service is running"}
 
 
+@app.get("/livez")
+async def livez():
+    return prober.livez()
+
+
+# Probes are answered on the event loop from the cached report, so they
+# never wait for a threadpool slot or open a database connection
+@app.get("/readyz")
 @app.get("/health")
-def health():
-    with engine.connect() as conn:
-        conn.execute(text("SELECT 1"))
-    return {"status": "healthy", "database": "connected"}
+async def readyz():
+    status_code, body = prober.readyz()
+    return JSONResponse(body, status_code=status_code)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return metrics.metrics_response()
+
+
+@app.get("/metrics/hashing")
+def hashing_metrics():
+    return hashing.stats()
 
 
 @app.get("/users/table-check")
@@ -32,35 +93,162 @@ def table_check():
 
 
 @app.post("/users/register", response_model=schemas.UserResponse, status_code=201)
-def register(body: schemas.RegisterRequest, db: Session = Depends(get_db)):
-    if db.query(models.User).filter(models.User.email == body.email).first():
-        raise HTTPException(status_code=409, detail="Email already registered")
-    if db.query(models.User).filter(models.User.username == body.username).first():
-        raise HTTPException(status_code=409, detail="Username already taken")
-
-    user = models.User(
-        email=body.email,
-        username=body.username,
-        hashed_password=auth.hash_password(body.password),
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+async def register(body: schemas.RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    """Create a user with a single INSERT ... RETURNING.
+
+    Duplicate emails and usernames are caught by the unique indexes on
+    users rather than checked up front, so there is no window between the
+    check and the insert and the happy path is one round trip.
+    """
+    hashed_password = await hashing.hash_password(body.password)
+    try:
+        user = await db.scalar(
+            insert(models.User)
+            .values(email=body.email, username=body.username, hashed_password=hashed_password)
+            .returning(models.User)
+        )
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=_conflict_detail(exc))
     return user
 
 
 @app.post("/users/login", response_model=schemas.TokenResponse)
-def login(body: schemas.LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == body.email).first()
+async def login(body: schemas.LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    rate_limit.enforce(login_account_limiter, body.email.lower())
+    user = (await db.execute(select(models.User).where(models.User.email == body.email))).scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
-    if not auth.verify_password(body.password, user.hashed_password):
+    matched, new_hash = await hashing.verify_and_update(body.password, user.hashed_password)
+    if not matched:
         raise HTTPException(status_code=401, detail="Invalid email or password")
-
-    token = auth.create_access_token({"sub": str(user.id), "email": user.email, "username": user.username})
-    return schemas.TokenResponse(access_token=token)
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made, store it at the new cost
+        user.hashed_password = new_hash
+        await db.commit()
+
+    await _delete_expired_tokens(user.id, db)
+    return await _issue_tokens(user, db)
+
+
+@app.post("/users/refresh", response_model=schemas.TokenResponse)
+async def refresh(body: schemas.RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token and refresh token.
+
+    The presented token is revoked and its user id read back in a single
+    UPDATE ... RETURNING on the unique token_hash index, so two concurrent
+    refreshes with the same token cannot both succeed and no password is
+    hashed. Presenting a token that was already rotated or revoked means it
+    has leaked, so every live refresh token for that user is revoked too,
+    unless it was revoked within the last REFRESH_REUSE_GRACE_SECONDS: that
+    is a client retry or parallel refresh losing the race to its own
+    rotation, and only the losing request is refused.
+    """
+    digest = auth.hash_refresh_token(body.refresh_token)
+    now = models.utcnow()
+    user_id = (
+        await db.execute(
+            update(models.RefreshToken)
+            .where(
+                models.RefreshToken.token_hash == digest,
+                models.RefreshToken.revoked_at.is_(None),
+                models.RefreshToken.expires_at > now,
+            )
+            .values(revoked_at=now)
+            .returning(models.RefreshToken.user_id)
+        )
+    ).scalar_one_or_none()
+
+    if user_id is None:
+        revoked = (
+            await db.execute(
+                select(models.RefreshToken.user_id, models.RefreshToken.revoked_at).where(
+                    models.RefreshToken.token_hash == digest,
+                    models.RefreshToken.revoked_at.is_not(None),
+                )
+            )
+        ).first()
+        grace_cutoff = now - timedelta(seconds=auth.REFRESH_REUSE_GRACE_SECONDS)
+        if revoked is not None and revoked.revoked_at < grace_cutoff:
+            await db.execute(
+                update(models.RefreshToken)
+                .where(models.RefreshToken.user_id == revoked.user_id, models.RefreshToken.revoked_at.is_(None))
+                .values(revoked_at=now)
+            )
+            await db.commit()
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    await _delete_expired_tokens(user_id, db)
+    user = await db.get(models.User, user_id)
+    return await _issue_tokens(user, db)
+
+
+@app.post("/users/logout", status_code=204)
+async def logout(body: schemas.RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    await db.execute(
+        update(models.RefreshToken)
+        .where(
+            models.RefreshToken.token_hash == auth.hash_refresh_token(body.refresh_token),
+            models.RefreshToken.revoked_at.is_(None),
+        )
+        .values(revoked_at=models.utcnow())
+    )
+    await db.commit()
 
 
 @app.get("/users/me", response_model=schemas.UserResponse)
-def get_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    return auth.get_current_user(token, db)
+async def get_me(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    if auth.USERS_ME_FROM_CLAIMS:
+        user = auth.user_from_claims(token)
+        if user is not None:
+            return user
+    return await auth.get_current_user(token, db)
+
+
+# Unique index on users -> 409 detail
+_UNIQUE_VIOLATIONS = {
+    "ix_users_email": "Email already registered",
+    "ix_users_username": "Username already taken",
+}
+
+
+def _conflict_detail(exc: IntegrityError) -> str:
+    """Map a unique violation from inserting a user to its 409 detail."""
+    message = str(exc.orig)
+    for constraint, detail in _UNIQUE_VIOLATIONS.items():
+        if constraint in message:
+            return detail
+    raise exc
+
+
+async def _delete_expired_tokens(user_id: int, db: AsyncSession) -> None:
+    """Delete user_id's expired refresh tokens; the caller commits.
+
+    Runs on every login and refresh, so rows left by rotation go away once
+    they expire even for users who never log in again. Revoked tokens are
+    kept until then: /users/refresh needs them to recognise a replay.
+    """
+    await db.execute(
+        delete(models.RefreshToken).where(
+            models.RefreshToken.user_id == user_id,
+            models.RefreshToken.expires_at < models.utcnow(),
+        )
+    )
+
+
+async def _issue_tokens(user: models.User, db: AsyncSession) -> schemas.TokenResponse:
+    """Store a new refresh token for user, commit, and return both tokens."""
+    refresh_token, digest, expires_at = auth.create_refresh_token()
+    db.add(models.RefreshToken(user_id=user.id, token_hash=digest, expires_at=expires_at))
+    await db.commit()
+
+    access_token = auth.create_access_token(
+        {
+            "sub": str(user.id),
+            "email": user.email,
+            "username": user.username,
+            "created_at": user.created_at.isoformat(),
+        }
+    )
+    return schemas.TokenResponse(access_token=access_token, refresh_token=refresh_token)
@@ -0,0 +1,21 @@
+"""
+Schema setup for the MeetMii user service.
+
+Creates any missing tables and indexes. Run it once per deploy when the
+service runs with AUTO_CREATE_SCHEMA=false, so instances skip DDL at boot.
+
+Usage:
+    python migrate.py
+"""
+
+from database import engine, Base
+import models  # noqa: F401  registers the tables on Base.metadata
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    print(f"Schema up to date: {', '.join(sorted(Base.metadata.tables))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,31 @@
 """
-ORM model representing a user in the MeetMii platform.
+ORM models for users in the MeetMii platform.
 
 Each User row stores login credentials and a unique username.
-The table is created automatically on app startup via Base.metadata.create_all.
+
+Each RefreshToken row is one long-lived refresh token issued at login.
+Only the SHA-256 digest of the token is stored, under a unique index, so a
+refresh is a single indexed lookup and a leaked table cannot be replayed.
+Revocation is a timestamp on the same row rather than a separate list.
+
+The tables are created on app startup via Base.metadata.create_all, or by
+migrate.py when AUTO_CREATE_SCHEMA=false.
 """
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String
 from database import Base
 
 
+def utcnow() -> datetime:
+    """Return the current UTC time as a naive datetime.
+
+    The timestamp columns are WITHOUT TIME ZONE, which asyncpg refuses to
+    bind aware datetimes to, so values are stored as naive UTC.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -17,4 +33,15 @@ class User(Base):
     email = Column(String, unique=True, nullable=False, index=True)
     hashed_password = Column(String, nullable=False)
     username = Column(String, unique=True, nullable=False, index=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(LargeBinary(32), unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=utcnow)
@@ -6,7 +6,10 @@ Pydantic schemas for the MeetMii user service.
                 Uses from_attributes=True so SQLAlchemy model instances can be
                 serialized directly.
 - LoginRequest: Validates the request body for POST /users/login.
-- TokenResponse: Shapes the JWT token returned after a successful login.
+- TokenResponse: Shapes the JWT access token and rotating refresh token
+                 returned after a successful login or refresh.
+- RefreshRequest: Validates the request body for POST /users/refresh and
+                  POST /users/logout.
 """
 
 from datetime import datetime
@@ -29,12 +32,19 @@ class LoginRequest(BaseModel):
 
 
 class TokenResponse(BaseModel):
-    """Output schema returned after a successful login."""
+    """Output schema returned after a successful login or refresh."""
 
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    """Input schema carrying a refresh token."""
+
+    refresh_token: str
+
+
 class UserResponse(BaseModel):
     """Output schema returned after a user is created."""
 